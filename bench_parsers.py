@@ -0,0 +1,329 @@
+import gc
+import json
+import time
+import argparse
+import platform
+import random
+import subprocess
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import app_v2
+from app_v2 import (
+    UA_MONTHS,
+    parse_product_details_from_html,
+    parse_rozetka_reviews_from_html,
+    rating_from_style,
+    parse_ua_date,
+    looks_like_cloudflare_challenge,
+)
+
+# Офлайн-бенчмарк парсерів: збережені сторінки з --fixtures + синтетичні сторінки.
+# Файли з "comments" у назві — сторінки відгуків, решта *.html — сторінки товару.
+
+FIXTURES_DIR = "data/html_fixtures"
+MONTHS = {v: k for k, v in UA_MONTHS.items()}
+WORDS = ["добре", "погано", "швидко", "ціна", "якість", "батарея", "екран", "доставка", "рекомендую", "камера"]
+
+
+def synthetic_comments_page(n_reviews: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    cards = []
+    for i in range(n_reviews):
+        pct = rnd.choice([20, 40, 60, 80, 100])
+        day, month, year = rnd.randint(1, 28), rnd.randint(1, 12), rnd.randint(2019, 2025)
+        text = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(5, 60)))
+        cards.append(
+            "<li><rz-product-comment><div class=\"comment\">"
+            "<div class=\"comment__header\">Відгук від покупця.</div>"
+            f"<rz-comment-rating><div data-testid=\"stars-rating\" style=\"width: calc({pct}% - 2px);\"></div></rz-comment-rating>"
+            f"<span class=\"comment__author\">Покупець {i}</span>"
+            f"<time>{day} {MONTHS[month]} {year}</time>"
+            "<div class=\"comment__vars\">Продавець: Rozetka</div>"
+            f"<p class=\"comment__text\">{text}</p>"
+            "<dl><dt>Переваги:</dt><dd>швидкий</dd><dt>Недоліки:</dt><dd>ціна</dd></dl>"
+            "<button>Відповісти</button>"
+            "</div></rz-product-comment></li>"
+        )
+    filler = "<script>window.__x = " + json.dumps({"k": "v" * 2000}) + ";</script>" * 20
+    return (
+        "<!doctype html><html lang=\"uk\"><head><title>Відгуки</title>" + filler + "</head>"
+        "<body><header><nav>" + "<a href=\"/c1/\">Категорія</a>" * 200 + "</nav></header>"
+        "<h1>Відгуки покупців</h1><ul class=\"comments__list\">" + "".join(cards) + "</ul>"
+        "<footer>" + "<p>footer</p>" * 200 + "</footer></body></html>"
+    )
+
+
+def synthetic_product_page(n_specs: int = 80, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    rows = "".join(
+        f"<tr><th>Характеристика {i}</th><td>{rnd.choice(WORDS)} {i}</td></tr>" for i in range(n_specs)
+    )
+    dl = "".join(f"<dt>Параметр {i}</dt><dd>{rnd.choice(WORDS)}</dd>" for i in range(n_specs))
+    jsonld = json.dumps({
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "BreadcrumbList"},
+            {
+                "@type": "Product",
+                "name": "Apple iPhone 15 128GB",
+                "brand": {"@type": "Brand", "name": "Apple"},
+                "sku": "MTP03RX/A",
+                "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.8", "reviewCount": "1234"},
+            },
+        ],
+    }, ensure_ascii=False)
+    desc = "<p>" + " ".join(rnd.choice(WORDS) for _ in range(3000)) + "</p>"
+    return (
+        "<!doctype html><html><head><title>Apple iPhone 15</title>"
+        f"<script type=\"application/ld+json\">{jsonld}</script></head><body>"
+        "<h1>Apple iPhone 15 128GB Black</h1>"
+        f"<rz-product-description>{desc}</rz-product-description>"
+        f"<table>{rows}</table><dl>{dl}</dl>"
+        "<footer>" + "<p>footer</p>" * 500 + "</footer></body></html>"
+    )
+
+
+def load_corpus(fixtures: Path, synthetic_reviews: list[int]) -> list[dict]:
+    corpus = []
+    if fixtures.is_dir():
+        for path in sorted(fixtures.glob("*.html")):
+            corpus.append({
+                "name": path.name,
+                "kind": "comments" if "comments" in path.name else "product",
+                "html": path.read_text(encoding="utf-8", errors="replace"),
+            })
+    for n in synthetic_reviews:
+        corpus.append({"name": f"synthetic_comments_{n}", "kind": "comments", "html": synthetic_comments_page(n)})
+    corpus.append({"name": "synthetic_product", "kind": "product", "html": synthetic_product_page()})
+    return corpus
+
+
+def parse_with(backend: str, item: dict):
+    app_v2.PARSER_BACKEND = backend
+    try:
+        if item["kind"] == "comments":
+            return parse_rozetka_reviews_from_html(item["html"], "bench://comments/")
+        res = parse_product_details_from_html(item["html"], "https://rozetka.com.ua/ua/x/p1/")
+        # сирий HTML опису бекенди серіалізують по-різному — порівнюємо текст
+        return {k: v for k, v in res.items() if k != "description_html"}
+    finally:
+        app_v2.PARSER_BACKEND = "bs4"
+
+
+def check_backends_agree(corpus: list[dict], backends: list[str]) -> list[str]:
+    """
+    Перед заміром: усі бекенди мають дати той самий результат, інакше порівнюємо швидкість різних речей.
+    Повертає імена сторінок, на яких результати розходяться.
+    """
+    if len(backends) < 2:
+        return []
+    mismatched = []
+    for item in corpus:
+        base = parse_with(backends[0], item)
+        for backend in backends[1:]:
+            other = parse_with(backend, item)
+            if other != base:
+                mismatched.append(item["name"])
+                print(f"MISMATCH {item['name']}: {backends[0]} != {backend}")
+                print(f"  {backends[0]}: {json.dumps(base, ensure_ascii=False, default=str)[:500]}")
+                print(f"  {backend}: {json.dumps(other, ensure_ascii=False, default=str)[:500]}")
+    return mismatched
+
+
+def peak_rss_bytes() -> int | None:
+    # Linux: VmHWM — пік саме цього адресного простору; ru_maxrss успадковує пік батька через fork+exec
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux — KB, macOS — байти
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    mi = psutil.Process().memory_info()
+    return getattr(mi, "peak_wset", mi.rss)
+
+
+def _rss_delta(backend: str, item: dict) -> int | None:
+    # у свіжому процесі: пік RSS до і після одного розбору (враховує C-алокації lxml / lexbor)
+    gc.collect()
+    before = peak_rss_bytes()
+    parse_with(backend, item)
+    after = peak_rss_bytes()
+    return None if before is None or after is None else after - before
+
+
+def measure_rss(backend: str, item: dict) -> int | None:
+    """
+    Приріст пікової RSS на один розбір. tracemalloc бачить лише купу Python, а не памʼять парсерів на C,
+    тож міряємо RSS — в окремому процесі, щоб пік попередніх замірів не ховав цей.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_rss_delta, backend, item).result()
+
+
+def measure(fn, repeat: int) -> tuple[float, object]:
+    """
+    Повертає (найкращий час, результат).
+    """
+    best = float("inf")
+    res = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        res = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+
+def bench_page_parsers(corpus: list[dict], backends: list[str], repeat: int, *, rss: bool) -> list[dict]:
+    results = []
+    for backend in backends:
+        app_v2.PARSER_BACKEND = backend
+
+        for item in corpus:
+            html = item["html"]
+            mb = len(html.encode("utf-8")) / (1024 * 1024)
+            if item["kind"] == "comments":
+                name = "parse_rozetka_reviews_from_html"
+                fn = lambda: parse_rozetka_reviews_from_html(html, "bench://comments/")
+            else:
+                name = "parse_product_details_from_html"
+                fn = lambda: parse_product_details_from_html(html, "https://rozetka.com.ua/ua/x/p1/")
+
+            sec, res = measure(fn, repeat)
+            n_reviews = len(res) if isinstance(res, list) else None
+            rss_delta = measure_rss(backend, item) if rss else None
+            row = {
+                "parser": name,
+                "backend": backend,
+                "input": item["name"],
+                "mb": round(mb, 3),
+                "sec": round(sec, 5),
+                "mb_per_s": round(mb / sec, 2) if sec else None,
+                "reviews": n_reviews,
+                "reviews_per_s": round(n_reviews / sec, 1) if n_reviews and sec else None,
+                "peak_rss_delta_mb": round(rss_delta / (1024 * 1024), 2) if rss_delta is not None else None,
+            }
+            results.append(row)
+            print(
+                f"{name:34s} {backend:10s} {item['name']:28s} {row['mb']:>7.2f}MB "
+                f"{row['sec']:>8.4f}s {row['mb_per_s']}MB/s reviews/s={row['reviews_per_s']} "
+                f"rss+={row['peak_rss_delta_mb']}MB"
+            )
+
+    app_v2.PARSER_BACKEND = "bs4"
+    return results
+
+
+def bench_small_funcs(corpus: list[dict], repeat: int) -> list[dict]:
+    rnd = random.Random(7)
+    styles = [f"width: calc({rnd.randint(0, 100)}% - 2px);" for _ in range(10_000)]
+    dates = [f"{rnd.randint(1, 28)} {MONTHS[rnd.randint(1, 12)]} {rnd.randint(2019, 2025)}" for _ in range(10_000)]
+    pages = [item["html"] for item in corpus]
+
+    cases = [
+        ("rating_from_style", styles, rating_from_style),
+        ("parse_ua_date", dates, parse_ua_date),
+        ("looks_like_cloudflare_challenge", pages, looks_like_cloudflare_challenge),
+    ]
+
+    results = []
+    for name, inputs, f in cases:
+        sec, _ = measure(lambda: [f(x) for x in inputs], repeat)
+        row = {
+            "parser": name,
+            "backend": None,
+            "input": f"{len(inputs)} items",
+            "sec": round(sec, 5),
+            "calls_per_s": round(len(inputs) / sec, 1) if sec else None,
+        }
+        if name == "looks_like_cloudflare_challenge":
+            mb = sum(len(x.encode("utf-8")) for x in inputs) / (1024 * 1024)
+            row["mb_per_s"] = round(mb / sec, 2) if sec else None
+        results.append(row)
+        print(f"{name:34s} {row['input']:>14s} {row['sec']:>8.4f}s calls/s={row['calls_per_s']}")
+    return results
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(old_path: str, results: list[dict]) -> None:
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    old_idx = {(r["parser"], r.get("backend"), r["input"]): r for r in old["results"]}
+
+    print(f"\nCompare with {old_path} (rev {old.get('git_rev')})")
+    for r in results:
+        o = old_idx.get((r["parser"], r.get("backend"), r["input"]))
+        if not o or not o.get("sec"):
+            continue
+        ratio = r["sec"] / o["sec"]
+        flag = "  SLOWER" if ratio > 1.1 else ("  faster" if ratio < 0.9 else "")
+        print(f"{r['parser']:34s} {str(r.get('backend')):10s} {r['input']:28s} {o['sec']:.4f}s -> {r['sec']:.4f}s x{ratio:.2f}{flag}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--fixtures", default=FIXTURES_DIR, help="dir with saved *.html pages")
+    p.add_argument("--synthetic-reviews", default="100,5000", help="sizes of synthetic comments pages")
+    p.add_argument("--backends", default="bs4,selectolax")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--out", default="data/bench_parsers.json")
+    p.add_argument("--compare", default=None, help="previous results JSON to compare with")
+    p.add_argument("--no-rss", action="store_true", help="skip per-page peak RSS (one fresh process per page)")
+    args = p.parse_args()
+
+    sizes = [int(x) for x in args.synthetic_reviews.split(",") if x.strip()]
+    backends = [x.strip() for x in args.backends.split(",") if x.strip()]
+    if "selectolax" in backends and app_v2.LexborHTMLParser is None:
+        print("skip backend selectolax (not installed)")
+        backends.remove("selectolax")
+
+    corpus = load_corpus(Path(args.fixtures), sizes)
+    print(f"Corpus: {len(corpus)} pages")
+
+    mismatched = check_backends_agree(corpus, backends)
+    if mismatched:
+        sys.exit(f"backends disagree on {len(mismatched)} page(s): {', '.join(mismatched)}")
+
+    results = bench_page_parsers(corpus, backends, args.repeat, rss=not args.no_rss)
+    results += bench_small_funcs(corpus, args.repeat)
+
+    out = {
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print("Saved:", args.out)
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
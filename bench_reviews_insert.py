@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import argparse
+import random
+from datetime import date, timedelta
+
+import psycopg
+from psycopg import sql
+
+from app_v2 import DB_DSN, UA_MONTHS, ensure_schema, ensure_unknown_category, upsert_product, insert_reviews
+
+# Порівняння запису відгуків: executemany vs COPY + staging.
+# Робочі таблиці не чіпає: копії categories/products/reviews у тимчасовій схемі (search_path),
+# яка видаляється після прогону. Окрема БД — BENCH_DSN.
+
+BENCH_DSN = os.getenv("BENCH_DSN", DB_DSN)
+BENCH_SCHEMA = os.getenv("BENCH_SCHEMA", "bench_reviews_insert")
+BENCH_TABLES = ("categories", "products", "reviews")
+BENCH_PRODUCT_URL = "bench://reviews-insert/"
+MONTHS = {v: k for k, v in UA_MONTHS.items()}
+
+
+def synthetic_reviews(n: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    start = date(2020, 1, 1)
+    out = []
+    for i in range(n):
+        d = start + timedelta(days=rnd.randint(0, 1800))
+        out.append({
+            "date": f"{d.day} {MONTHS[d.month]} {d.year}",
+            "rating": rnd.randint(1, 5),
+            "text": f"Відгук #{i}: " + " ".join(rnd.choice(["добре", "погано", "швидко", "ціна", "якість"]) for _ in range(12)),
+            "pros": "швидкий" if i % 3 == 0 else None,
+            "cons": "ціна" if i % 5 == 0 else None,
+        })
+    return out
+
+
+def create_scratch_schema(conn, schema: str) -> None:
+    """
+    Порожні копії таблиць (колонки, defaults, індекси) у власній схемі + search_path на неї:
+    app_v2 пише в некваліфіковані таблиці, тож усі вставки йдуть сюди.
+    """
+    conn.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(schema)))
+    conn.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(schema)))
+    for table in BENCH_TABLES:
+        conn.execute(sql.SQL("CREATE TABLE {} (LIKE public.{} INCLUDING ALL)").format(
+            sql.Identifier(schema, table), sql.Identifier(table),
+        ))
+        # serial-колонки після LIKE досі беруть nextval з послідовностей public — даємо свої
+        serials = conn.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s AND column_default LIKE 'nextval(%%'
+            """,
+            (schema, table),
+        ).fetchall()
+        for (col,) in serials:
+            seq = f"{table}_{col}_seq"
+            conn.execute(sql.SQL("CREATE SEQUENCE {} OWNED BY {}.{}").format(
+                sql.Identifier(schema, seq), sql.Identifier(schema, table), sql.Identifier(col),
+            ))
+            conn.execute(sql.SQL("ALTER TABLE {} ALTER COLUMN {} SET DEFAULT nextval({})").format(
+                sql.Identifier(schema, table), sql.Identifier(col), sql.Literal(f"{schema}.{seq}"),
+            ))
+    conn.execute(sql.SQL("SET search_path TO {}").format(sql.Identifier(schema)))
+    conn.commit()
+
+
+def drop_scratch_schema(conn, schema: str) -> None:
+    conn.rollback()
+    conn.execute("SET search_path TO DEFAULT")
+    conn.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(schema)))
+    conn.commit()
+
+
+def run_one(conn, product_id: int, reviews: list[dict], method: str) -> dict:
+    conn.execute("DELETE FROM reviews WHERE product_id = %s", (product_id,))
+    conn.commit()
+
+    t0 = time.perf_counter()
+    first = insert_reviews(conn, product_id=product_id, comments_url=BENCH_PRODUCT_URL, reviews=reviews, method=method)
+    t_first = time.perf_counter() - t0
+
+    # повторний прогін: усе — дублікати (типовий пере-збір)
+    t0 = time.perf_counter()
+    again = insert_reviews(conn, product_id=product_id, comments_url=BENCH_PRODUCT_URL, reviews=reviews, method=method)
+    t_again = time.perf_counter() - t0
+
+    return {
+        "method": method,
+        "rows": len(reviews),
+        "sec": round(t_first, 3),
+        "rows_per_sec": round(len(reviews) / t_first, 1) if t_first else None,
+        "inserted": first["inserted"],
+        "sec_all_duplicates": round(t_again, 3),
+        "duplicates": again["duplicates"],
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", default="1000,10000,100000", help="comma separated row counts")
+    p.add_argument("--methods", default="executemany,copy")
+    p.add_argument("--out", default=None, help="write results as JSON")
+    p.add_argument("--dsn", default=BENCH_DSN, help="database for the scratch schema (BENCH_DSN)")
+    p.add_argument("--schema", default=BENCH_SCHEMA, help="scratch schema, dropped after the run")
+    args = p.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    methods = [x.strip() for x in args.methods.split(",") if x.strip()]
+
+    results = []
+    if args.schema == "public":
+        raise SystemExit("--schema public would write into the live tables")
+
+    with psycopg.connect(args.dsn) as conn:
+        create_scratch_schema(conn, args.schema)
+        try:
+            ensure_schema(conn)
+            cat_id = ensure_unknown_category(conn)
+            product_id = upsert_product(conn, category_id=cat_id, data={"url": BENCH_PRODUCT_URL, "title": "bench"})
+            for n in sizes:
+                reviews = synthetic_reviews(n)
+                for method in methods:
+                    res = run_one(conn, product_id, reviews, method)
+                    results.append(res)
+                    print(
+                        f"{method:12s} rows={n:>7d} {res['sec']:>8.3f}s "
+                        f"({res['rows_per_sec']} rows/s) inserted={res['inserted']} "
+                        f"| dup-run {res['sec_all_duplicates']:.3f}s duplicates={res['duplicates']}"
+                    )
+        finally:
+            drop_scratch_schema(conn, args.schema)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print("Saved:", args.out)
+
+
+if __name__ == "__main__":
+    main()
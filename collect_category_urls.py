@@ -1,26 +1,215 @@
 import asyncio
 import json
 import re
+import argparse
 from pathlib import Path
 from playwright.async_api import async_playwright
 
 #зарядні станції CATEGORY_URL = "https://rozetka.com.ua/ua/zaryadnie-stantsii-4674585/c4674585/"
 CATEGORY_URL = "https://rozetka.com.ua/ua/mobile-phones/c80003/filter/seller=rozetka/"
 OUT_FILE = "product_urls.json"
+OUT_JSONL = "product_urls.jsonl"
+
+# службові сторінки товару — не товари
+SERVICE_PARTS = ("/comments/", "/questions/", "/characteristics/", "/seller/")
+
+# усі посилання сторінки одним evaluate (а не get_attribute на кожне)
+LINKS_JS = """
+() => Array.from(document.querySelectorAll('a[href*="/p"]'), (a) => a.href)
+"""
+
+# найбільший номер сторінки в пагінації
+MAX_PAGE_JS = """
+() => {
+  let max = 0;
+  for (const a of document.querySelectorAll('rz-paginator a, .pagination a, a[href*="page="]')) {
+    const n = parseInt((a.textContent || '').trim(), 10);
+    if (!isNaN(n) && n > max) max = n;
+  }
+  return max;
+}
+"""
+
 
 def normalize(url: str | None) -> str | None:
     if not url:
         return None
-    url = url.split("?")[0]
+    if url.startswith("/"):
+        url = "https://rozetka.com.ua" + url
+    url = url.split("?")[0].split("#")[0].strip()
+    if any(part in url for part in SERVICE_PARTS):
+        return None
     if re.search(r"/p\d+/", url):
         if not url.endswith("/"):
             url += "/"
         return url
     return None
 
+
+def category_id(url: str) -> str | None:
+    m = re.search(r"/c(\d+)/", url)
+    return m.group(1) if m else None
+
+
+def category_page_url(url: str, page: int) -> str:
+    """
+    Rozetka тримає номер сторінки в тому ж сегменті, що й фільтри:
+      .../c80003/page=2/
+      .../c80003/filter/page=2;seller=rozetka/
+    """
+    url = url.split("?")[0].rstrip("/")
+    # прибираємо page=N, якщо вже є
+    url = re.sub(r"(?<=[/;])page=\d+;?", "", url).rstrip("/;")
+    if page <= 1:
+        return url + "/"
+
+    head, _, last = url.rpartition("/")
+    if "=" in last:
+        return f"{head}/page={page};{last}/"
+    return f"{url}/page={page}/"
+
+
+class Collector:
+    def __init__(self, out_jsonl: Path):
+        self.out_jsonl = out_jsonl
+        self.seen: set[str] = set()
+        # у порядку знаходження (як у JSONL)
+        self.order: list[str] = []
+        # що бачили саме в цьому запуску — для обходу без пагінатора
+        self.run_seen: set[str] = set()
+        if out_jsonl.exists():
+            # дописуємо до вже зібраного, без дублів
+            for line in out_jsonl.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    u = json.loads(line)["url"]
+                    if u not in self.seen:
+                        self.seen.add(u)
+                        self.order.append(u)
+        self.fh = out_jsonl.open("a", encoding="utf-8")
+
+    def add(self, urls: list[str], category_url: str, page: int) -> tuple[int, int]:
+        """
+        Повертає (нових узагалі, нових у цьому запуску).
+        """
+        new = 0
+        fresh = 0
+        for u in urls:
+            u = normalize(u)
+            if u is None:
+                continue
+            if u not in self.run_seen:
+                self.run_seen.add(u)
+                fresh += 1
+            if u in self.seen:
+                continue
+            self.seen.add(u)
+            self.order.append(u)
+            self.fh.write(json.dumps({
+                "url": u,
+                "category_id": category_id(category_url),
+                "category_url": category_url,
+                "page": page,
+            }, ensure_ascii=False) + "\n")
+            new += 1
+        self.fh.flush()
+        return new, fresh
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+def write_url_list(path: Path, discovered: list[str]) -> list[str]:
+    """
+    product_urls.json лише дописується: вже наявні URL лишаються на своїх індексах
+    (на них тримаються --start/--end і checkpoint_<start>_<end>.json), нові — в кінець у порядку знаходження.
+    """
+    urls: list[str] = []
+    if path.exists():
+        urls = json.loads(path.read_text(encoding="utf-8"))
+    known = set(urls)
+    urls += [u for u in discovered if u not in known]
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(urls, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+    return urls
+
+
+async def scrape_page(page, url: str, *, wait_ms: int) -> tuple[list[str], int, str]:
+    await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+    try:
+        await page.wait_for_selector('a[href*="/p"]', timeout=wait_ms)
+    except Exception:
+        pass
+    links = await page.evaluate(LINKS_JS)
+    max_page = await page.evaluate(MAX_PAGE_JS)
+    return links, max_page, page.url
+
+
+async def worker(ctx, queue: asyncio.Queue, collector: Collector, state: dict, *, wait_ms: int, retries: int) -> None:
+    page = await ctx.new_page()
+    try:
+        while True:
+            cat_url, n, attempt = await queue.get()
+            try:
+                url = category_page_url(cat_url, n)
+                try:
+                    links, max_page, final_url = await scrape_page(page, url, wait_ms=wait_ms)
+                except Exception as e:
+                    print(f"[c{category_id(cat_url)} p{n}] EXC {type(e).__name__}: {e}")
+                    # без повтору впала сторінка 1 = вся категорія
+                    if attempt < retries:
+                        await asyncio.sleep(2 ** attempt)
+                        queue.put_nowait((cat_url, n, attempt + 1))
+                    continue
+
+                new, fresh = collector.add(links, cat_url, n)
+                print(f"[c{category_id(cat_url)} p{n}] links={len(links)} new={new} total={len(collector.seen)}")
+
+                st = state[cat_url]
+                if n == 1 and max_page > 1:
+                    # відома кількість сторінок — ставимо всі в чергу одразу
+                    st["max_page"] = max_page
+                    for k in range(2, max_page + 1):
+                        queue.put_nowait((cat_url, k, 0))
+                elif n == 1 and max_page == 1:
+                    st["max_page"] = 1
+                elif st["max_page"] is None and fresh > 0 and final_url.rstrip("/") == url.rstrip("/"):
+                    # пагінацію не знайшли — йдемо по одній, доки сторінка дає товари, не бачені в цьому запуску
+                    # (при повторному запуску всі вже є в JSONL; сторінку за межами Rozetka редіректить на першу)
+                    queue.put_nowait((cat_url, n + 1, 0))
+            finally:
+                queue.task_done()
+    finally:
+        await page.close()
+
+
 async def main():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
+    p = argparse.ArgumentParser()
+    p.add_argument("--category", action="append", default=None, help="category URL (repeatable)")
+    p.add_argument("--categories-file", default=None, help="text file, one category URL per line")
+    p.add_argument("--tabs", type=int, default=4, help="parallel tabs")
+    p.add_argument("--wait-ms", type=int, default=15_000, help="max wait for product links on a page")
+    p.add_argument("--retries", type=int, default=2, help="retries per failed category page")
+    p.add_argument("--out-jsonl", default=OUT_JSONL)
+    p.add_argument("--out", default=OUT_FILE, help="also write flat JSON list for run_range_to_db.py")
+    args = p.parse_args()
+
+    categories = list(args.category or [])
+    if args.categories_file:
+        categories += [ln.strip() for ln in Path(args.categories_file).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    if not categories:
+        categories = [CATEGORY_URL]
+
+    collector = Collector(Path(args.out_jsonl))
+    queue: asyncio.Queue = asyncio.Queue()
+    state = {}
+    for c in categories:
+        state[c] = {"max_page": None}
+        queue.put_nowait((c, 1, 0))
+
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(
             headless=False,  # важливо для CF
             args=["--disable-blink-features=AutomationControlled"],
         )
@@ -28,71 +217,18 @@ async def main():
             viewport={"width": 1280, "height": 900},
             locale="uk-UA",
         )
-        page = await ctx.new_page()
-
-        await page.goto(CATEGORY_URL, wait_until="domcontentloaded")
-
-        urls = set()
-        clicks = 0
-
-        while True:
-            # 1) зібрати всі товари, які вже є
-            links = await page.locator('a[href*="/p"]').all()
-            for a in links:
-                href = await a.get_attribute("href")
-                if not href:
-                    continue
-
-                # абсолютний url
-                if href.startswith("/"):
-                    href = "https://rozetka.com.ua" + href
-
-                # прибрати query
-                href = href.split("?")[0].strip()
-
-                # ✅ відкидаємо службові сторінки
-                if "/comments/" in href:
-                    continue
-                if "/questions/" in href:
-                    continue
-                if "/characteristics/" in href:
-                    continue
-                if "/seller/" in href:
-                    continue
 
-                # ✅ лишаємо тільки товарний патерн:
-                # /.../p123456789/
-                if not re.search(r"/p\d+/", href):
-                    continue
-
-                if not href.endswith("/"):
-                    href += "/"
-
-                urls.add(href)
-
-            # 2) спробувати натиснути "Показати ще"
-            show_more = page.locator("text=Показати ще")
-            if await show_more.count() == 0:
-                break
-
-            try:
-                await show_more.first.click()
-                clicks += 1
-                await page.wait_for_timeout(1500)
-            except Exception:
-                break
-
-            # safety limit
-            if clicks >= 7:
-                break
+        workers = [asyncio.create_task(worker(ctx, queue, collector, state, wait_ms=args.wait_ms, retries=args.retries)) for _ in range(args.tabs)]
+        await queue.join()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
 
         await browser.close()
 
-    urls = sorted(urls)
-    Path(OUT_FILE).write_text(
-        json.dumps(urls, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    collector.close()
+
+    urls = write_url_list(Path(args.out), collector.order)
 
     print(f"Collected {len(urls)} product URLs")
 
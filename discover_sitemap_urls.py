@@ -0,0 +1,221 @@
+import re
+import json
+import time
+import zlib
+import asyncio
+import argparse
+from pathlib import Path
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import XMLPullParser
+
+import httpx
+
+from collect_category_urls import normalize, write_url_list
+
+# Пошук товарів через sitemap по звичайному HTTP (без браузера).
+# Індекс -> дочірні sitemap-и товарів -> URL + lastmod, потоково, без завантаження файлу цілком.
+
+ROBOTS_URL = "https://rozetka.com.ua/robots.txt"
+OUT_JSONL = "product_urls_sitemap.jsonl"
+OUT_FILE = "product_urls.json"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+CHUNK = 64 * 1024
+
+
+def _local_name(tag: str) -> str:
+    # {http://www.sitemaps.org/schemas/sitemap/0.9}url -> url
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapSource:
+    """
+    Звідки читати sitemap-и: з мережі (httpx, пул зʼєднань) або з локальної теки
+    з фікстурами (файл шукається за імʼям з URL).
+    """
+
+    def __init__(self, local_dir: Path | None, concurrency: int):
+        self.local_dir = local_dir
+        self.client = None
+        if local_dir is None:
+            self.client = httpx.AsyncClient(
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=concurrency),
+                timeout=httpx.Timeout(120.0, connect=10.0),
+                follow_redirects=True,
+            )
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def text(self, url: str) -> str:
+        if self.local_dir is not None:
+            path = self.local_dir / Path(urlsplit(url).path).name
+            return path.read_text(encoding="utf-8") if path.exists() else ""
+        resp = await self.client.get(url)
+        return resp.text if resp.status_code < 400 else ""
+
+    async def chunks(self, url: str):
+        gz = url.endswith(".gz")
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        def _feed(chunk: bytes) -> bytes:
+            nonlocal gz
+            # .xml інколи віддають вже стиснутим — дивимось на gzip magic
+            if not gz and chunk[:2] == b"\x1f\x8b":
+                gz = True
+            return inflater.decompress(chunk) if gz else chunk
+
+        if self.local_dir is not None:
+            path = self.local_dir / Path(urlsplit(url).path).name
+            with path.open("rb") as f:
+                while True:
+                    chunk = f.read(CHUNK)
+                    if not chunk:
+                        break
+                    yield _feed(chunk)
+            return
+
+        async with self.client.stream("GET", url) as resp:
+            resp.raise_for_status()
+            # raw: httpx не розпаковує .gz-файл, лише Content-Encoding
+            async for chunk in resp.aiter_raw() if gz else resp.aiter_bytes():
+                yield _feed(chunk)
+
+
+async def iter_sitemap(source: SitemapSource, url: str):
+    """
+    Потоково віддає ("sitemap" | "url", loc, lastmod) з одного sitemap-файлу.
+    Розібрані елементи одразу чистимо, тож памʼять не росте з розміром файлу.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    root = None
+    async for chunk in source.chunks(url):
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            kind = _local_name(elem.tag)
+            if kind not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local_name(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = (child.text or "").strip() or None
+            elem.clear()
+            if root is not None:
+                root.clear()
+            if loc:
+                yield kind, loc, lastmod
+    parser.close()
+
+
+async def sitemaps_from_robots(source: SitemapSource, robots_url: str) -> list[str]:
+    text = await source.text(robots_url)
+    return [m.group(1).strip() for m in re.finditer(r"(?im)^\s*sitemap:\s*(\S+)", text)]
+
+
+class Discovery:
+    def __init__(self, source: SitemapSource, out_jsonl: Path, *, sitemap_filter: re.Pattern | None, since: str | None, concurrency: int):
+        self.source = source
+        self.sitemap_filter = sitemap_filter
+        self.since = since
+        self.sem = asyncio.Semaphore(concurrency)
+        self.seen_urls: dict[str, str | None] = {}
+        self.seen_sitemaps: set[str] = set()
+        self.stats = {"sitemaps": 0, "locs": 0, "products": 0, "skipped_old": 0, "errors": 0}
+        self.fh = out_jsonl.open("w", encoding="utf-8")
+
+    def _emit(self, loc: str, lastmod: str | None) -> None:
+        self.stats["locs"] += 1
+        url = normalize(loc)
+        if url is None or url in self.seen_urls:
+            return
+        if self.since and lastmod and lastmod[:10] < self.since:
+            self.stats["skipped_old"] += 1
+            return
+        self.seen_urls[url] = lastmod
+        self.stats["products"] += 1
+        self.fh.write(json.dumps({"url": url, "lastmod": lastmod}, ensure_ascii=False) + "\n")
+
+    async def crawl(self, sitemap_url: str) -> None:
+        if sitemap_url in self.seen_sitemaps:
+            return
+        self.seen_sitemaps.add(sitemap_url)
+
+        children: list[str] = []
+        async with self.sem:
+            try:
+                async for kind, loc, lastmod in iter_sitemap(self.source, sitemap_url):
+                    if kind == "sitemap":
+                        if self.sitemap_filter is None or self.sitemap_filter.search(loc):
+                            children.append(loc)
+                    else:
+                        self._emit(loc, lastmod)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"EXC {sitemap_url} -> {type(e).__name__}: {e}")
+                return
+            self.stats["sitemaps"] += 1
+            print(f"{sitemap_url} -> products={self.stats['products']} children={len(children)}")
+
+        # дочірні sitemap-и — паралельно (семафор обмежує одночасні завантаження)
+        await asyncio.gather(*(self.crawl(c) for c in children))
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+async def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sitemap", action="append", default=None, help="sitemap or sitemap index URL (repeatable)")
+    p.add_argument("--robots", default=ROBOTS_URL, help="robots.txt to read Sitemap: lines from")
+    p.add_argument("--local", default=None, help="read sitemaps from this dir instead of the network (fixtures)")
+    p.add_argument("--filter", default=r"product|goods", help="regex for child sitemaps to follow ('' = all)")
+    p.add_argument("--since", default=None, help="only URLs with lastmod >= YYYY-MM-DD")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--out-jsonl", default=OUT_JSONL)
+    p.add_argument("--out", default=None, help=f"also write flat JSON list (e.g. {OUT_FILE})")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    source = SitemapSource(Path(args.local) if args.local else None, args.concurrency)
+    discovery = Discovery(
+        source,
+        Path(args.out_jsonl),
+        sitemap_filter=re.compile(args.filter) if args.filter else None,
+        since=args.since,
+        concurrency=args.concurrency,
+    )
+    try:
+        roots = list(args.sitemap or [])
+        if not roots:
+            roots = await sitemaps_from_robots(source, args.robots)
+        if not roots:
+            print("No sitemaps found (pass --sitemap)")
+            return
+        # корені не фільтруємо — фільтр лише для дочірніх
+        await asyncio.gather(*(discovery.crawl(r) for r in roots))
+    finally:
+        discovery.close()
+        await source.aclose()
+
+    if args.out:
+        # лише дописуємо: на індексах product_urls.json тримаються --start/--end і checkpoint-и run_range_to_db.py
+        write_url_list(Path(args.out), list(discovery.seen_urls))
+
+    dt = time.perf_counter() - t0
+    print(f"DONE {discovery.stats} in {dt:.1f}s -> {args.out_jsonl}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
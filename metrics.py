@@ -0,0 +1,128 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Any
+
+# Мінімальні метрики у текстовому форматі Prometheus (exposition format 0.0.4),
+# без prometheus_client: лічильники, гістограми і gauge з мітками.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# секунди: від швидкого evaluate до довгого гортання сторінок відгуків
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+BYTES_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_lock = threading.Lock()
+_registry: list["_Metric"] = []
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, Any] = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _snapshot(self) -> list[tuple]:
+        with _lock:
+            return sorted((k, v if not isinstance(v, list) else [list(v[0]), v[1], v[2]]) for k, v in self._values.items())
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, v in self._snapshot():
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}")
+        return lines
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, v in self._snapshot():
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames: tuple[str, ...] = (), buckets=SECONDS_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                # [лічильники по бакетах (+Inf останній), сума, кількість]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for key, (counts, total, n) in self._snapshot():
+            cum = 0
+            for le, c in zip(self.buckets + (math.inf,), counts):
+                cum += c
+                le_label = 'le="' + _fmt(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {cum}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+def render() -> str:
+    with _lock:
+        metrics = list(_registry)
+    lines: list[str] = []
+    for m in metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,53 @@
 import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-from sqlalchemy import create_engine
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
 from ml.config import DB_DSN, RAW_REVIEWS_PARQUET, DATA_DIR
 
+# RAW_REVIEWS_PARQUET — тека-датасет з part-*.parquet (pd.read_parquet читає її як один файл).
+# Службові файли з "_" на початку pyarrow пропускає:
+#   _state.json        — watermark (останній вивантажений reviews.id) і список частин
+#   _products.parquet  — зліпок метаданих товарів з попереднього запуску
+#   _manifest.json     — для кожної частини: яким діапазоном вона вивантажена, скільки рядків, за скільки
+STATE_FILE = "_state.json"
+PRODUCTS_SNAPSHOT = "_products.parquet"
+MANIFEST_FILE = "_manifest.json"
+
+# Потокове вивантаження: server-side cursor -> чистка по шматках -> row group у ParquetWriter
+CHUNK_ROWS = int(os.getenv("EXTRACT_CHUNK_ROWS", "50000"))
+
+# Паралельне вивантаження: N діапазонів reviews.id (або груп category_id),
+# кожен — у своєму процесі і на своєму зʼєднанні, одна частина на діапазон
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))
+EXTRACT_SPLIT = os.getenv("EXTRACT_SPLIT", "id")  # id | category
+
+# reviews.id — із sequence, а краулер пише паралельно: транзакція з id нижче max(id) може
+# закомітитись уже після нашого запуску. Тому кожен інкремент перечитує EXTRACT_ID_OVERLAP id
+# під watermark і відкидає ті review_id, що вже є в частинах.
+EXTRACT_ID_OVERLAP = int(os.getenv("EXTRACT_ID_OVERLAP", "20000"))
+
+CATEGORY_COUNTS_SQL = """
+SELECT p.category_id, count(*) AS n
+FROM reviews r
+JOIN products p ON p.id = r.product_id
+WHERE r.id > :after AND r.id <= :upto
+GROUP BY p.category_id
+"""
+
 SQL = """
 SELECT
   r.id               AS review_id,
@@ -27,6 +72,41 @@ JOIN products p ON p.id = r.product_id
 LEFT JOIN categories c ON c.id = p.category_id
 """
 
+PRODUCTS_SQL = """
+SELECT
+  p.id               AS product_id,
+  p.title            AS product_name,
+  p.brand            AS brand,
+  p.sku              AS sku,
+  p.url              AS product_url,
+  p.category_id      AS category_id,
+  c.name             AS category_name
+FROM products p
+LEFT JOIN categories c ON c.id = p.category_id
+"""
+
+# фіксована схема: усі шматки і частини пишуться з однаковими типами
+PARQUET_SCHEMA = pa.schema([
+    ("review_id", pa.int64()),
+    ("product_id", pa.int64()),
+    ("rating", pa.int64()),
+    ("text", pa.string()),
+    ("pros", pa.string()),
+    ("cons", pa.string()),
+    ("review_date", pa.date32()),
+    ("review_url", pa.string()),
+    ("product_pk", pa.int64()),
+    ("product_name", pa.string()),
+    ("brand", pa.string()),
+    ("sku", pa.string()),
+    ("product_url", pa.string()),
+    ("category_id", pa.int64()),
+    ("category_name", pa.string()),
+])
+
+# поля товару, які денормалізовані в кожен рядок відгуку
+PRODUCT_META_COLS = ["product_name", "brand", "sku", "product_url", "category_id", "category_name"]
+
 def _norm_series(s: pd.Series) -> pd.Series:
     return (
         s.fillna("")
@@ -51,36 +131,462 @@ def _build_effective_text(df: pd.DataFrame) -> pd.Series:
 
     return eff
 
-def main():
-    os.makedirs(DATA_DIR, exist_ok=True)
-
-    engine = create_engine(DB_DSN)
-    df = pd.read_sql(SQL, engine)
-
+def clean(df: pd.DataFrame) -> pd.DataFrame:
     # 1) rating clean
     df["rating"] = pd.to_numeric(df["rating"], errors="coerce")
     df = df[df["rating"].notna()].copy()
-    df["rating"] = df["rating"].astype(int).clip(1, 5)
+    df["rating"] = df["rating"].astype("int64").clip(1, 5)
 
     # 2) sku must-have (бо весь пайплайн на SKU)
     df["sku"] = _norm_series(df["sku"])
     df = df[df["sku"].str.len() > 0].copy()
 
-    # 3) category_id normalize (корисно для groupby)
-    df["category_id"] = pd.to_numeric(df["category_id"], errors="coerce")
+    # 3) category_id normalize (корисно для groupby); Int64 — щоб тип не "плавав" між частинами
+    df["category_id"] = pd.to_numeric(df["category_id"], errors="coerce").astype("Int64")
 
     # 4) effective text (text/pros/cons)
     df["text"] = _build_effective_text(df)
     df = df[df["text"].str.len() > 0].copy()
 
-    # 5) normalize meta strings
+    # 5) дата без часу (date32 у схемі parquet)
+    df["review_date"] = pd.to_datetime(df["review_date"], errors="coerce", format="mixed").dt.date
+
+    # 6) normalize meta strings
     for col in ["brand", "product_name", "category_name", "product_url", "review_url"]:
         if col in df.columns:
             df[col] = _norm_series(df[col])
 
-    df.to_parquet(RAW_REVIEWS_PARQUET, index=False)
-    print("Saved:", RAW_REVIEWS_PARQUET, "rows:", len(df))
-    print("Columns:", list(df.columns))
+    return df
+
+def product_fingerprints(products: pd.DataFrame) -> pd.DataFrame:
+    """
+    product_id -> хеш метаданих (після тієї ж нормалізації, що й у clean).
+    """
+    meta = products[PRODUCT_META_COLS].copy()
+    for col in ["product_name", "brand", "sku", "product_url", "category_name"]:
+        meta[col] = _norm_series(meta[col])
+    meta["category_id"] = pd.to_numeric(meta["category_id"], errors="coerce")
+    return pd.DataFrame({
+        "product_id": products["product_id"].to_numpy(),
+        "meta_hash": pd.util.hash_pandas_object(meta, index=False).to_numpy(),
+    })
+
+def _write_part(df: pd.DataFrame, out_dir: str, name: str) -> None:
+    # атомарно: pyarrow не читає файли з "." на початку
+    tmp = os.path.join(out_dir, "." + name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, os.path.join(out_dir, name))
+
+def _load_state(out_dir: str) -> dict | None:
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.isdir(out_dir) or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_json(out_dir: str, name: str, obj: dict) -> None:
+    tmp = os.path.join(out_dir, "." + name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(out_dir, name))
+
+def _save_state(out_dir: str, state: dict) -> None:
+    _write_json(out_dir, STATE_FILE, state)
+
+def _load_manifest(out_dir: str) -> dict:
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("parts", {})
+
+def _save_manifest(out_dir: str, manifest: dict, parts: list[str]) -> None:
+    # лише частини, що лишились у датасеті
+    _write_json(out_dir, MANIFEST_FILE, {
+        "parts": {name: manifest[name] for name in parts if name in manifest},
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+def drop_products_from_parts(
+    out_dir: str, parts: list[str], product_ids: set[int], *, stream: bool = True, chunk_rows: int = CHUNK_ROWS,
+) -> tuple[list[str], int]:
+    """
+    Прибирає рядки товарів зі старих частин (спершу лише колонка product_id,
+    переписуються тільки ті частини, де вони є). Повертає (частини, що лишились, скільки рядків прибрано).
+    stream=False — стара версія (частина цілком у памʼять), для порівняння памʼяті.
+    """
+    value_set = pa.array(sorted(product_ids), type=pa.int64())
+    kept: list[str] = []
+    dropped = 0
+    for name in parts:
+        path = os.path.join(out_dir, name)
+        tmp = os.path.join(out_dir, "." + name + ".tmp")
+        with pq.ParquetFile(path) as pf:
+            hits = sum(
+                pc.sum(pc.is_in(batch.column(0), value_set=value_set)).as_py() or 0
+                for batch in pf.iter_batches(batch_size=chunk_rows, columns=["product_id"])
+            )
+            if not hits:
+                kept.append(name)
+                continue
+            dropped += hits
+
+            rows = 0
+            if stream:
+                # по шматках: у памʼяті не більше chunk_rows рядків незалежно від розміру частини
+                with pq.ParquetWriter(tmp, pf.schema_arrow) as writer:
+                    for batch in pf.iter_batches(batch_size=chunk_rows):
+                        batch = batch.filter(pc.invert(pc.is_in(batch.column("product_id"), value_set=value_set)))
+                        if batch.num_rows:
+                            writer.write_batch(batch)
+                            rows += batch.num_rows
+            else:
+                df = pf.read().to_pandas()
+                df = df[~df["product_id"].isin(product_ids)]
+                rows = len(df)
+                df.to_parquet(tmp, index=False)
+
+        if rows:
+            os.replace(tmp, path)
+            kept.append(name)
+        else:
+            os.remove(tmp)
+            os.remove(path)
+    return kept, dropped
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux — KB, macOS — байти
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    mi = psutil.Process().memory_info()
+    return getattr(mi, "peak_wset", mi.rss) / (1024 * 1024)
+
+def _iter_chunks(engine, queries: list[tuple[str, dict]], chunk_rows: int):
+    # stream_results -> server-side cursor: у памʼяті не більше одного шматка
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_rows) as conn:
+        for sql, params in queries:
+            yield from pd.read_sql(text(sql), conn, params=params, chunksize=chunk_rows)
+
+def extract_part(
+    engine, queries: list[tuple[str, dict]], out_dir: str, name: str, *,
+    stream: bool = True, chunk_rows: int = CHUNK_ROWS, exclude_ids: set[int] | None = None,
+) -> int:
+    """
+    Результат queries (після clean) -> одна частина out_dir/name. Повертає кількість рядків;
+    0 — частина не створюється.
+    stream=False — старий шлях (увесь результат у памʼять), для порівняння памʼяті.
+    exclude_ids — review_id, які вже є в датасеті (вікно перекриття під watermark).
+    """
+    tmp = os.path.join(out_dir, "." + name + ".tmp")
+    rows = 0
+    if stream:
+        with pq.ParquetWriter(tmp, PARQUET_SCHEMA) as writer:
+            for chunk in _iter_chunks(engine, queries, chunk_rows):
+                df = clean(chunk)
+                if exclude_ids:
+                    df = df[~df["review_id"].isin(exclude_ids)]
+                if len(df):
+                    writer.write_table(pa.Table.from_pandas(df[PARQUET_SCHEMA.names], schema=PARQUET_SCHEMA, preserve_index=False))
+                    rows += len(df)
+    else:
+        df = clean(pd.concat([pd.read_sql(text(sql), engine, params=params) for sql, params in queries], ignore_index=True))
+        if exclude_ids:
+            df = df[~df["review_id"].isin(exclude_ids)]
+        rows = len(df)
+        pq.write_table(pa.Table.from_pandas(df[PARQUET_SCHEMA.names], schema=PARQUET_SCHEMA, preserve_index=False), tmp)
+
+    if rows == 0:
+        os.remove(tmp)
+        return 0
+    os.replace(tmp, os.path.join(out_dir, name))
+    return rows
+
+def id_ranges(after: int, upto: int, n: int) -> list[tuple[int, int]]:
+    """
+    (after, upto] -> до n суміжних піддіапазонів (a, b] однакової ширини.
+    """
+    if upto <= after:
+        return []
+    n = max(1, min(n, upto - after))
+    step = -(-(upto - after) // n)
+    return [(a, min(a + step, upto)) for a in range(after, upto, step)]
+
+def category_buckets(engine, after: int, upto: int, n: int) -> list[list[int | None]]:
+    """
+    category_id -> n груп, збалансованих за кількістю відгуків у (after, upto]
+    (найбільша категорія — у найлегшу групу). None — товари без категорії.
+    """
+    counts = pd.read_sql(text(CATEGORY_COUNTS_SQL), engine, params={"after": after, "upto": upto})
+    counts = counts.sort_values("n", ascending=False)
+    buckets: list[list[int | None]] = [[] for _ in range(max(1, n))]
+    load = [0] * len(buckets)
+    for cat, cnt in zip(counts["category_id"], counts["n"]):
+        i = load.index(min(load))
+        buckets[i].append(None if pd.isna(cat) else int(cat))
+        load[i] += int(cnt)
+    return [b for b in buckets if b]
+
+def _category_filter(cats: list[int | None]) -> tuple[str, dict]:
+    ids = [c for c in cats if c is not None]
+    conds = []
+    if ids:
+        conds.append("p.category_id = ANY(:cats)")
+    if len(ids) < len(cats):
+        conds.append("p.category_id IS NULL")
+    return "(" + " OR ".join(conds) + ")", {"cats": ids}
+
+def plan_range_tasks(engine, after: int, upto: int, *, split: str, workers: int, prefix: str) -> list[dict]:
+    """
+    Нові відгуки (after, upto] -> задачі {name, queries, range}, по одній частині на діапазон.
+    """
+    base = SQL + " WHERE r.id > :after AND r.id <= :upto"
+    if workers <= 1:
+        return [{
+            "name": f"{prefix}.parquet",
+            "queries": [(base, {"after": after, "upto": upto})],
+            "range": {"split": "id", "after": after, "upto": upto},
+        }]
+
+    tasks = []
+    if split == "category":
+        for k, cats in enumerate(category_buckets(engine, after, upto, workers)):
+            cond, params = _category_filter(cats)
+            tasks.append({
+                "name": f"{prefix}-{k:03d}.parquet",
+                "queries": [(base + " AND " + cond, {"after": after, "upto": upto, **params})],
+                "range": {"split": "category", "after": after, "upto": upto, "category_ids": cats},
+            })
+    else:
+        for k, (a, b) in enumerate(id_ranges(after, upto, workers)):
+            tasks.append({
+                "name": f"{prefix}-{k:03d}.parquet",
+                "queries": [(base, {"after": a, "upto": b})],
+                "range": {"split": "id", "after": a, "upto": b},
+            })
+    return tasks
+
+def _extract_task(task: dict, out_dir: str, stream: bool) -> tuple[str, int, float]:
+    # у процесі-воркері — власне зʼєднання (NullPool: одне на задачу, без пулу)
+    engine = create_engine(DB_DSN, poolclass=NullPool)
+    t0 = time.perf_counter()
+    try:
+        rows = extract_part(engine, task["queries"], out_dir, task["name"], stream=stream, exclude_ids=task.get("exclude_ids"))
+    finally:
+        engine.dispose()
+    return task["name"], rows, time.perf_counter() - t0
+
+def run_tasks(engine, tasks: list[dict], out_dir: str, *, stream: bool, workers: int) -> dict:
+    """
+    Виконує задачі (паралельно, якщо workers > 1). Повертає записи маніфесту
+    лише для непорожніх частин: {name: {range..., rows, sec}}.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        results = []
+        for task in tasks:
+            t0 = time.perf_counter()
+            rows = extract_part(engine, task["queries"], out_dir, task["name"], stream=stream, exclude_ids=task.get("exclude_ids"))
+            results.append((task["name"], rows, time.perf_counter() - t0))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_extract_task, tasks, repeat(out_dir), repeat(stream)))
+
+    by_name = {t["name"]: t for t in tasks}
+    manifest = {}
+    for name, rows, sec in results:
+        if rows:
+            manifest[name] = {**by_name[name]["range"], "rows": rows, "sec": round(sec, 2)}
+        print(f"  {name}: rows={rows} {sec:.1f}s")
+    return manifest
+
+def run_full(engine, out_dir: str, upto: int, *, stream: bool = True, workers: int = 1, split: str = "id") -> None:
+    # будуємо поруч і підміняємо в кінці: падіння посередині не лишає напівдатасет
+    build_dir = out_dir + ".building"
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+    os.makedirs(build_dir)
+
+    with engine.connect() as conn:
+        after = conn.execute(text("SELECT coalesce(min(id), 1) - 1 FROM reviews")).scalar_one()
+    prefix = f"part-{datetime.now():%Y%m%d-%H%M%S}-full"
+    tasks = plan_range_tasks(engine, after, upto, split=split, workers=workers, prefix=prefix)
+    manifest = run_tasks(engine, tasks, build_dir, stream=stream, workers=workers)
+    parts = [t["name"] for t in tasks if t["name"] in manifest]
+    rows = sum(m["rows"] for m in manifest.values())
+
+    products = pd.read_sql(text(PRODUCTS_SQL), engine)
+    _write_part(product_fingerprints(products), build_dir, PRODUCTS_SNAPSHOT)
+    _save_manifest(build_dir, manifest, parts)
+    _save_state(build_dir, {
+        "last_review_id": upto,
+        "parts": parts,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    # старий формат (один файл) або попередній датасет — замінюємо повністю
+    if os.path.isfile(out_dir):
+        os.remove(out_dir)
+    elif os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.replace(build_dir, out_dir)
+
+    print("Saved:", out_dir, "rows:", rows, "parts:", len(parts))
+    print("Columns:", PARQUET_SCHEMA.names)
+
+def exported_ids_above(out_dir: str, parts: list[str], after: int, skip_products: set[int]) -> set[int]:
+    """
+    review_id > after, що вже лежать у частинах (крім товарів skip_products — їх рядки перезаписуються).
+    Читаються лише дві колонки і лише рядки вікна.
+    """
+    ids: set[int] = set()
+    for name in parts:
+        t = pq.read_table(os.path.join(out_dir, name), columns=["review_id", "product_id"], filters=[("review_id", ">", after)])
+        df = t.to_pandas()
+        if skip_products:
+            df = df[~df["product_id"].isin(skip_products)]
+        ids.update(int(x) for x in df["review_id"])
+    return ids
+
+def run_incremental(
+    engine, out_dir: str, state: dict, upto: int, *, stream: bool = True, workers: int = 1, split: str = "id",
+) -> None:
+    last_id = int(state["last_review_id"])
+    parts = list(state["parts"])
+
+    # частини, яких немає в state — залишки перерваного запуску
+    for name in os.listdir(out_dir):
+        if name.startswith("part-") and name not in parts:
+            os.remove(os.path.join(out_dir, name))
+
+    # 1) товари зі зміненими метаданими (назва, бренд, sku, категорія...)
+    products = pd.read_sql(text(PRODUCTS_SQL), engine)
+    current = product_fingerprints(products)
+    previous = pd.read_parquet(os.path.join(out_dir, PRODUCTS_SNAPSHOT))
+    merged = current.merge(previous, on="product_id", how="inner", suffixes=("", "_prev"))
+    changed = set(merged.loc[merged["meta_hash"] != merged["meta_hash_prev"], "product_id"].astype(int))
+
+    # 2) нові відгуки з вікном перекриття (lo, upto] + усі старші відгуки змінених товарів
+    #    (з новими метаданими; їх же могли раніше відкинути, напр. через порожній sku).
+    #    У вікні вже вивантажені id відкидаються — крім змінених товарів: їхні рядки зі старих частин прибираються
+    lo = max(0, last_id - EXTRACT_ID_OVERLAP)
+    known = exported_ids_above(out_dir, parts, lo, changed)
+    prefix = f"part-{datetime.now():%Y%m%d-%H%M%S}"
+    tasks = plan_range_tasks(engine, lo, upto, split=split, workers=workers, prefix=prefix)
+    for task in tasks:
+        task["exclude_ids"] = known
+    if changed:
+        changed_query = (SQL + " WHERE r.product_id = ANY(:ids) AND r.id <= :after", {"ids": sorted(changed), "after": lo})
+        if workers <= 1:
+            # як і раніше — усе в одну частину
+            tasks[0]["queries"].append(changed_query)
+            tasks[0]["range"]["changed_products"] = len(changed)
+        else:
+            tasks.append({
+                "name": f"{prefix}-changed.parquet",
+                "queries": [changed_query],
+                "range": {"split": "product", "upto": lo, "changed_products": len(changed)},
+            })
+    new_manifest = run_tasks(engine, tasks, out_dir, stream=stream, workers=workers)
+    rows = sum(m["rows"] for m in new_manifest.values())
+
+    dropped = 0
+    if changed:
+        parts, dropped = drop_products_from_parts(out_dir, parts, changed, stream=stream)
+    parts.extend(t["name"] for t in tasks if t["name"] in new_manifest)
+
+    # зліпок товарів — останнім: якщо впадемо до нього, наступний запуск знову побачить
+    # ці товари зміненими і перевивантажить їх (а не втратить "-changed" частину)
+    _save_manifest(out_dir, {**_load_manifest(out_dir), **new_manifest}, parts)
+    _save_state(out_dir, {"last_review_id": upto, "parts": parts, "updated_at": datetime.now().isoformat(timespec="seconds")})
+    _write_part(current, out_dir, PRODUCTS_SNAPSHOT)
+
+    print(
+        f"Incremental: reviews id ({last_id}, {upto}] + overlap from {lo} (already exported={len(known)}) -> rows={rows}; "
+        f"changed products={len(changed)} (rows replaced={dropped}); parts={len(parts)}"
+    )
+
+def bench_drop(out_dir: str, *, stream: bool) -> None:
+    """
+    Частина інкрементального запуску "змінені товари": прибирає з кожної частини рядки одного товару,
+    тож переписується весь датасет. Датасет після цього не узгоджений зі state — лише для --bench-memory.
+    """
+    state = _load_state(out_dir)
+    if state is None:
+        sys.exit(f"{out_dir}: no {STATE_FILE}")
+    ids = set()
+    for name in state["parts"]:
+        with pq.ParquetFile(os.path.join(out_dir, name)) as pf:
+            ids.add(pf.read_row_group(0, columns=["product_id"]).column(0)[0].as_py())
+    _, dropped = drop_products_from_parts(out_dir, state["parts"], ids, stream=stream)
+    print(f"Dropped products={len(ids)} rows={dropped}")
+
+def _run_measured(cmd: list[str]) -> float | None:
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    print(proc.stdout.strip())
+    peak = [ln for ln in proc.stdout.splitlines() if ln.startswith("PEAK_RSS_MB=")]
+    return float(peak[-1].split("=", 1)[1]) if peak and peak[-1] != "PEAK_RSS_MB=None" else None
+
+def bench_memory() -> None:
+    """
+    Повне вивантаження і переписування частин для змінених товарів — старим (усе в памʼять)
+    і новим (потоковим) шляхом в окремих процесах у тимчасові теки; порівнюємо пікову RSS.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("in-memory", "stream"):
+            out = os.path.join(tmp, f"raw_reviews_{mode}.parquet")
+            base = [sys.executable, "-m", "ml.01_extract_dataset", "--out", out]
+            if mode == "in-memory":
+                base.append("--in-memory")
+            results[(mode, "full export")] = _run_measured(base + ["--full"])
+            results[(mode, "drop products")] = _run_measured(base + ["--bench-drop"])
+
+    print("\nPeak RSS, MB:")
+    for (mode, step), mb in results.items():
+        print(f"  {mode:10s} {step:14s} {mb if mb is None else round(mb, 1)}")
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--full", action="store_true", help="rebuild the whole dataset instead of appending a part")
+    p.add_argument("--out", default=RAW_REVIEWS_PARQUET, help="dataset directory")
+    p.add_argument("--in-memory", action="store_true", help="old path: whole result set in memory (for comparison)")
+    p.add_argument("--bench-memory", action="store_true", help="run full export and changed-products rewrite both ways, report peak RSS")
+    p.add_argument("--bench-drop", action="store_true", help="drop one product from every part of --out (used by --bench-memory; leaves the dataset inconsistent)")
+    p.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="parallel ranges/connections (1 = single part)")
+    p.add_argument("--split", choices=("id", "category"), default=EXTRACT_SPLIT, help="partition by reviews.id ranges or category_id groups")
+    args = p.parse_args()
+
+    if args.bench_memory:
+        bench_memory()
+        return
+    if args.bench_drop:
+        bench_drop(args.out, stream=not args.in_memory)
+        print(f"PEAK_RSS_MB={peak_rss_mb()}")
+        return
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    engine = create_engine(DB_DSN)
+    stream = not args.in_memory
+
+    # верхня межа фіксується на старті: що вставиться під час вивантаження — піде в наступний запуск
+    with engine.connect() as conn:
+        upto = conn.execute(text("SELECT coalesce(max(id), 0) FROM reviews")).scalar_one()
+
+    state = None if args.full else _load_state(args.out)
+    if state is None:
+        run_full(engine, args.out, upto, stream=stream, workers=args.workers, split=args.split)
+    else:
+        run_incremental(engine, args.out, state, upto, stream=stream, workers=args.workers, split=args.split)
+
+    print(f"PEAK_RSS_MB={peak_rss_mb()}")
 
 if __name__ == "__main__":
     main()
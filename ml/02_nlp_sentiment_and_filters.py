@@ -1,4 +1,8 @@
 import os
+import re
+import time
+import sqlite3
+import hashlib
 import pandas as pd
 from transformers import pipeline
 
@@ -9,6 +13,136 @@ SENTIMENT_MODEL = os.environ.get(
     "SENTIMENT_MODEL",
     "cointegrated/rubert-tiny-sentiment-balanced"
 )
+MAX_LENGTH = 256
+BATCH_SIZE = 16
+
+# Кеш результатів моделі між запусками: (хеш нормалізованого тексту, модель, max_length) -> label, score.
+# На модель йдуть лише промахи. Понад SENTIMENT_CACHE_MAX_ROWS витісняються найдавніше використані.
+SENTIMENT_CACHE = os.environ.get("SENTIMENT_CACHE", "data/sentiment_cache.sqlite")
+SENTIMENT_CACHE_MAX_ROWS = int(os.environ.get("SENTIMENT_CACHE_MAX_ROWS", "2000000"))
+
+_WS_RE = re.compile(r"\s+")
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(_WS_RE.sub(" ", text or "").strip().encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    def __init__(self, path: str, model: str, max_length: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.model = model
+        self.max_length = max_length
+        self.hits = 0
+        self.misses = 0
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+          text_hash  TEXT NOT NULL,
+          model      TEXT NOT NULL,
+          max_length INTEGER NOT NULL,
+          label      TEXT NOT NULL,
+          score      REAL NOT NULL,
+          last_used  INTEGER NOT NULL,
+          PRIMARY KEY (text_hash, model, max_length)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_sentiment_cache_last_used ON sentiment_cache (last_used);
+        """)
+
+    def get_many(self, keys: list[str]) -> dict[str, tuple[str, float]]:
+        """
+        keys (унікальні) -> {key: (label, score)} для знайдених; знайденим оновлюється last_used.
+        """
+        found: dict[str, tuple[str, float]] = {}
+        now = int(time.time())
+        # ліміт параметрів SQLite — 999 у старих збірках
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i + 900]
+            marks = ",".join("?" * len(chunk))
+            params = (self.model, self.max_length, *chunk)
+            rows = self.conn.execute(
+                f"SELECT text_hash, label, score FROM sentiment_cache "
+                f"WHERE model = ? AND max_length = ? AND text_hash IN ({marks})",
+                params,
+            ).fetchall()
+            for h, label, score in rows:
+                found[h] = (label, score)
+            self.conn.execute(
+                f"UPDATE sentiment_cache SET last_used = ? "
+                f"WHERE model = ? AND max_length = ? AND text_hash IN ({marks})",
+                (now, *params),
+            )
+        self.conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: list[tuple[str, str, float]]) -> None:
+        now = int(time.time())
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache (text_hash, model, max_length, label, score, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(h, self.model, self.max_length, label, score, now) for h, label, score in items],
+        )
+        self.conn.commit()
+
+    def evict(self, max_rows: int) -> int:
+        """
+        LRU: лишає max_rows найсвіжіше використаних записів (усіх моделей). Повертає, скільки видалено.
+        """
+        total = self.conn.execute("SELECT count(*) FROM sentiment_cache").fetchone()[0]
+        extra = total - max_rows
+        if extra <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM sentiment_cache WHERE (text_hash, model, max_length) IN ("
+            " SELECT text_hash, model, max_length FROM sentiment_cache ORDER BY last_used LIMIT ?)",
+            (extra,),
+        )
+        self.conn.commit()
+        return extra
+
+    def close(self) -> None:
+        self.conn.close()
+
+def predict_sentiment(texts: list[str], cache: SentimentCache) -> tuple[list[str], list[float]]:
+    """
+    texts -> (labels, scores). Однакові тексти рахуються один раз; відомі беруться з кешу.
+    """
+    keys = [text_key(t) for t in texts]
+    first: dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        first.setdefault(k, t)
+
+    results = cache.get_many(list(first))
+    todo = [k for k in first if k not in results]
+
+    if todo:
+        t0 = time.perf_counter()
+        # модель вантажимо лише коли є що рахувати
+        sent_pipe = pipeline(
+            "text-classification",
+            model=SENTIMENT_MODEL,
+            tokenizer=SENTIMENT_MODEL,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            padding=True,
+            top_k=None
+        )
+        preds = sent_pipe([first[k] for k in todo], batch_size=BATCH_SIZE)
+
+        fresh = []
+        for k, p in zip(todo, preds):
+            if isinstance(p, list):
+                p0 = max(p, key=lambda x: x["score"])
+            else:
+                p0 = p
+            results[k] = (p0["label"], float(p0["score"]))
+            fresh.append((k, p0["label"], float(p0["score"])))
+        cache.put_many(fresh)
+        print(f"Inference: {len(todo)} texts in {time.perf_counter() - t0:.1f}s")
+
+    labels = [results[k][0] for k in keys]
+    scores = [results[k][1] for k in keys]
+    return labels, scores
 
 def sentiment_to_3(label: str) -> str:
     l = (label or "").lower()
@@ -45,29 +179,18 @@ def main():
     # 🔒 працюємо тільки з SKU
     df = df[df["sku"].notna()].copy()
 
-    sent_pipe = pipeline(
-        "text-classification",
-        model=SENTIMENT_MODEL,
-        tokenizer=SENTIMENT_MODEL,
-        truncation=True,
-        max_length=256,      
-        padding=True,
-        top_k=None
-    )
-
-    texts = df["text"].astype(str).tolist()
-    preds = sent_pipe(texts, batch_size=16)
-
-    labels = []
-    scores = []
-
-    for p in preds:
-        if isinstance(p, list):
-            p0 = max(p, key=lambda x: x["score"])
-        else:
-            p0 = p
-        labels.append(p0["label"])
-        scores.append(float(p0["score"]))
+    cache = SentimentCache(SENTIMENT_CACHE, SENTIMENT_MODEL, MAX_LENGTH)
+    try:
+        texts = df["text"].astype(str).tolist()
+        labels, scores = predict_sentiment(texts, cache)
+        evicted = cache.evict(SENTIMENT_CACHE_MAX_ROWS)
+        lookups = cache.hits + cache.misses
+        print(
+            f"Sentiment cache: texts={len(texts)} unique={lookups} hits={cache.hits} misses={cache.misses} "
+            f"hit_rate={cache.hits / lookups if lookups else 0:.1%} evicted={evicted}"
+        )
+    finally:
+        cache.close()
 
     df["sent_label_raw"] = labels
     df["sent_score"] = scores
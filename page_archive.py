@@ -0,0 +1,90 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+
+try:
+    import zstandard  # pip install zstandard
+except ImportError:
+    zstandard = None
+
+# Архів сирих сторінок: об'єкти адресуються sha256 від html (однакові сторінки — один файл),
+# індекс — JSONL по днях: url, тип сторінки, час завантаження, sha256.
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "data/page_archive"))
+ZSTD_LEVEL = int(os.getenv("ARCHIVE_ZSTD_LEVEL", "10"))
+
+
+class PageArchive:
+    def __init__(self, root: Path = ARCHIVE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index_dir = self.root / "index"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # ext залежить від того, чи є zstandard (без нього — gzip)
+        self.ext = ".zst" if zstandard is not None else ".gz"
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha: str, ext: str) -> Path:
+        return self.objects / sha[:2] / (sha + ext)
+
+    def put(self, html: str, *, url: str, kind: str, **meta) -> str:
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+
+        path = self._object_path(sha, self.ext)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if zstandard is not None:
+                blob = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+            else:
+                blob = gzip.compress(data)
+            tmp = path.with_suffix(path.suffix + f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+
+        now = datetime.now(timezone.utc)
+        entry = {
+            "url": url,
+            "kind": kind,
+            "fetched_at": now.isoformat(timespec="seconds"),
+            "sha256": sha,
+            "bytes": len(data),
+            **meta,
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with (self.index_dir / f"{now.date().isoformat()}.jsonl").open("a", encoding="utf-8") as f:
+                f.write(line)
+        return sha
+
+    def get(self, sha: str) -> str:
+        for ext in (".zst", ".gz"):
+            path = self._object_path(sha, ext)
+            if path.exists():
+                blob = path.read_bytes()
+                if ext == ".zst":
+                    if zstandard is None:
+                        raise RuntimeError("zstandard is required to read .zst archive objects")
+                    return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+                return gzip.decompress(blob).decode("utf-8")
+        raise FileNotFoundError(sha)
+
+    def iter_index(self, *, since: str | None = None, until: str | None = None):
+        """
+        since/until — дати YYYY-MM-DD (включно), фільтр за іменем файлу індексу.
+        """
+        for path in sorted(self.index_dir.glob("*.jsonl")):
+            day = path.stem
+            if since and day < since:
+                continue
+            if until and day > until:
+                continue
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
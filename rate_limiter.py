@@ -0,0 +1,138 @@
+import time
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+
+# AIMD-регулятор паралельності і паузи між запитами (як congestion control у TCP):
+# поки все здорово — ліміт повільно росте (+increase за "вікно" з limit успіхів),
+# на Cloudflare / таймаут / повільну відповідь — різко падає (×decrease), а пауза подвоюється.
+
+SIGNALS = ("ok", "slow", "cf", "timeout", "error")
+
+
+class AimdLimiter:
+    def __init__(
+        self,
+        *,
+        initial: float,
+        min_limit: float = 1,
+        max_limit: float,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_target_s: float | None = None,
+        delay_s: float = 0.0,
+        min_delay_s: float = 0.0,
+        max_delay_s: float = 30.0,
+        cooldown_s: float = 10.0,
+        history: int = 100,
+    ):
+        self.min_limit = max(1.0, float(min_limit))
+        self.max_limit = max(self.min_limit, float(max_limit))
+        self.limit = min(self.max_limit, max(self.min_limit, float(initial)))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target_s = latency_target_s
+        self.delay_s = delay_s
+        self.min_delay_s = min_delay_s
+        self.max_delay_s = max_delay_s
+        # один "інцидент" (кілька вкладок ловлять CF одночасно) — одне зменшення, а не каскад
+        self.cooldown_s = cooldown_s
+        self._last_decrease = 0.0
+
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.counts = {s: 0 for s in SIGNALS}
+        self.history: deque[dict] = deque(maxlen=history)
+        self._note("init")
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    def _note(self, reason: str) -> None:
+        self.history.append({
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "limit": round(self.limit, 2),
+            "delay_s": round(self.delay_s, 2),
+            "reason": reason,
+        })
+
+    def _wake(self) -> None:
+        free = self.current - self.in_flight
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    async def acquire(self) -> float:
+        """
+        Чекає вільного місця в межах поточного ліміту. Повертає час очікування (с).
+        """
+        t0 = time.perf_counter()
+        while self.in_flight >= self.current:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    # нас уже розбудили — віддаємо місце наступному
+                    self._wake()
+                else:
+                    try:
+                        self._waiters.remove(fut)
+                    except ValueError:
+                        pass
+                raise
+        self.in_flight += 1
+        return time.perf_counter() - t0
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    async def pace(self) -> None:
+        # пауза між послідовними запитами (замість фіксованих 600 мс)
+        if self.delay_s > 0:
+            await asyncio.sleep(self.delay_s)
+
+    def record(self, signal: str = "ok", latency_s: float | None = None) -> str:
+        """
+        Сигнал від одного запиту. "ok" з latency понад latency_target_s вважається "slow".
+        """
+        if signal == "ok" and latency_s is not None and self.latency_target_s and latency_s > self.latency_target_s:
+            signal = "slow"
+        self.counts[signal] = self.counts.get(signal, 0) + 1
+
+        if signal == "ok":
+            before = self.current
+            # +increase за кожні ~limit успіхів
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self.delay_s = max(self.min_delay_s, self.delay_s * 0.95)
+            if self.current != before:
+                self._note("increase")
+                self._wake()
+        elif signal in ("slow", "cf", "timeout"):
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_s:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self.delay_s = min(self.max_delay_s, max(self.delay_s * 2, self.min_delay_s, 0.5))
+                self._note(signal)
+        # "error" (не мережа/сайт, а наш код або 4xx) — на ліміт не впливає
+        return signal
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "current": self.current,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "delay_s": round(self.delay_s, 2),
+            "latency_target_s": self.latency_target_s,
+            "signals": dict(self.counts),
+            "history": list(self.history)[-20:],
+        }
@@ -0,0 +1,138 @@
+import argparse
+import time
+from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import psycopg
+
+import app_v2
+from app_v2 import (
+    DB_DSN,
+    parse_product_details_from_html,
+    parse_rozetka_reviews_from_html,
+    ratings_from_html,
+    apply_card_meta,
+    rozetka_comments_url,
+    ensure_schema,
+    ensure_unknown_category,
+    write_product_and_reviews,
+)
+from page_archive import PageArchive, ARCHIVE_DIR
+
+# Перерозбір архіву сторінок без мережі: ті самі парсери, що й в app_v2, і той самий запис у БД.
+
+
+def group_runs(entries: list[dict], *, latest_only: bool) -> list[list[dict]]:
+    """
+    Сторінки одного ingest (product + comments) -> одна група.
+    latest_only: для кожного товару беремо лише останній прохід.
+    """
+    runs: dict[str, list[dict]] = defaultdict(list)
+    for e in entries:
+        key = e.get("ingest_id") or f"{e.get('product_url') or e.get('comments_url')}@{e['fetched_at'][:10]}"
+        runs[key].append(e)
+
+    groups = [g for g in runs.values() if any(e["kind"] == "product" for e in g)]
+    if not latest_only:
+        return groups
+
+    latest: dict[str, list[dict]] = {}
+    for g in groups:
+        product_url = next(e["url"] for e in g if e["kind"] == "product")
+        fetched = max(e["fetched_at"] for e in g)
+        cur = latest.get(product_url)
+        if cur is None or fetched > max(e["fetched_at"] for e in cur):
+            latest[product_url] = g
+    return list(latest.values())
+
+
+def parse_run(root: str, run: list[dict]) -> dict:
+    """
+    Виконується у воркері: читає сторінки з архіву і розбирає їх.
+    """
+    archive = PageArchive(Path(root))
+    product_entry = max((e for e in run if e["kind"] == "product"), key=lambda e: e["fetched_at"])
+    product_url = product_entry["url"]
+    product_data = parse_product_details_from_html(archive.get(product_entry["sha256"]), product_url)
+
+    comments_url = rozetka_comments_url(product_url)
+    reviews = []
+    for e in sorted((e for e in run if e["kind"] == "comments"), key=lambda e: e["fetched_at"]):
+        html = archive.get(e["sha256"])
+        page_reviews = parse_rozetka_reviews_from_html(html, comments_url)
+        # без review_ids (DOM-знімки) відгуки отримують h:-ключі; з живими id:-рядками їх зіставляє insert_reviews
+        apply_card_meta(page_reviews, e.get("ratings") or ratings_from_html(html), e.get("review_ids") or [])
+        reviews.extend(page_reviews)
+
+    return {
+        "product_data": product_data,
+        "comments_url": comments_url,
+        "reviews": reviews,
+        "captured_at": product_entry["fetched_at"],
+    }
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--archive", default=str(ARCHIVE_DIR))
+    p.add_argument("--since", default=None, help="YYYY-MM-DD")
+    p.add_argument("--until", default=None, help="YYYY-MM-DD")
+    p.add_argument("--url", default=None, help="only products whose URL contains this")
+    p.add_argument("--all-runs", action="store_true", help="replay every archived run, not only the latest per product")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--dry-run", action="store_true", help="parse only, do not write to DB")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    archive = PageArchive(Path(args.archive))
+    entries = list(archive.iter_index(since=args.since, until=args.until))
+    runs = group_runs(entries, latest_only=not args.all_runs)
+    if args.url:
+        runs = [g for g in runs if any(args.url in e["url"] for e in g if e["kind"] == "product")]
+    print(f"Archive: {len(entries)} pages, {len(runs)} runs to replay")
+
+    ok = fail = n_reviews = inserted = 0
+    conn = None if args.dry_run else psycopg.connect(DB_DSN)
+    try:
+        if conn is not None:
+            ensure_schema(conn)
+            app_v2._unknown_category_id = ensure_unknown_category(conn)
+            conn.commit()
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(parse_run, args.archive, run) for run in runs]
+            for fut in futures:
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    print(f"FAIL parse -> {type(e).__name__}: {e}")
+                    fail += 1
+                    continue
+
+                n_reviews += len(res["reviews"])
+                if conn is not None:
+                    # дані товару зі знімку не перетирають новіший живий рядок
+                    _, written = write_product_and_reviews(
+                        conn,
+                        product_data=res["product_data"],
+                        comments_url=res["comments_url"],
+                        reviews=res["reviews"],
+                        captured_at=datetime.fromisoformat(res["captured_at"]),
+                    )
+                    inserted += written["inserted"]
+                ok += 1
+                print(f"OK {res['product_data']['url']} -> reviews={len(res['reviews'])}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+    print(
+        f"DONE runs ok={ok} fail={fail} reviews={n_reviews} inserted={inserted} "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
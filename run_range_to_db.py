@@ -1,45 +1,308 @@
+import os
 import json
 import time
+import random
+import asyncio
 import argparse
+from pathlib import Path
+
+import httpx
 import requests
 
-API_URL = "http://localhost:8000/fetch/rozetka/to_db"   
+from rate_limiter import AimdLimiter
+
+API_URL = os.getenv("ROZETKA_API_URL", "http://localhost:8000/fetch/rozetka/to_db")
+JOBS_URL = os.getenv("ROZETKA_JOBS_URL", "http://localhost:8000/jobs")
 IN_FILE = "product_urls.json"
 
+# 5xx (502 CF, 504 timeout) і 429 — повторюємо; інші 4xx — ні
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def run_jobs(batch: list[str], start: int, poll: float, full: bool = False) -> None:
+    """
+    Віддаємо всю пачку в чергу сервера одним запитом і опитуємо статуси,
+    замість того щоб тримати 600-секундне зʼєднання на кожен товар.
+    """
+    resp = requests.post(f"{JOBS_URL}/rozetka/to_db/bulk", json={"product_urls": batch, "full": full}, timeout=60)
+    resp.raise_for_status()
+    data = resp.json()
+
+    # позиція в batch: index від сервера (accepted і rejected ідуть упереміш)
+    pending = {j["job_id"]: (start + j["index"], j["product_url"]) for j in data["accepted"]}
+    accepted_idx = {j["index"] for j in data["accepted"]}
+    for i, url in enumerate(batch):
+        if i not in accepted_idx:
+            print(f"[{start + i}] REJECTED (queue full) {url}")
+    print(f"Submitted {len(pending)} jobs, rejected {len(data['rejected'])}")
+
+    ok = 0
+    fail = len(data["rejected"])
+
+    while pending:
+        time.sleep(poll)
+        for job_id in list(pending):
+            i, url = pending[job_id]
+            try:
+                r = requests.get(f"{JOBS_URL}/{job_id}", timeout=30)
+                if r.status_code == 404:
+                    # сервер уже витіснив задачу (JOBS_KEEP) або перезапустився — результату не буде
+                    print(f"[{i}] LOST {url} -> job {job_id} unknown to server")
+                    fail += 1
+                    del pending[job_id]
+                    continue
+                r.raise_for_status()
+                job = r.json()
+
+                if job["status"] == "done":
+                    r = requests.get(f"{JOBS_URL}/{job_id}/result", timeout=30)
+                    if r.status_code == 404:
+                        print(f"[{i}] LOST {url} -> result of job {job_id} evicted")
+                        fail += 1
+                        del pending[job_id]
+                        continue
+                    r.raise_for_status()
+                    res = r.json()
+                    print(f"[{i}] OK {url} -> reviews={res.get('count')} inserted={res.get('attempted_insert') or res.get('inserted')} dup={res.get('duplicates')}")
+                    ok += 1
+                    del pending[job_id]
+                elif job["status"] == "failed":
+                    print(f"[{i}] FAIL {url} -> {job.get('error')}")
+                    fail += 1
+                    del pending[job_id]
+            except Exception as e:
+                print(f"[{i}] EXC poll {url} -> {type(e).__name__}: {e}")
+
+    print(f"DONE ok={ok} fail={fail}")
+
+class Checkpoint:
+    """
+    Які індекси вже зроблені / впали. Пишеться атомарно після кожного товару,
+    щоб --start/--end можна було перезапустити після падіння.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: dict[str, dict] = {}
+        self.failed: dict[str, str] = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.done = data.get("done", {})
+            self.failed = data.get("failed", {})
+
+    def mark_done(self, i: int, info: dict) -> None:
+        self.done[str(i)] = info
+        self.failed.pop(str(i), None)
+        self._save()
+
+    def mark_failed(self, i: int, err: str) -> None:
+        self.failed[str(i)] = err
+        self._save()
+
+    def _save(self) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"done": self.done, "failed": self.failed}, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))
+    return values[k]
+
+
+def response_signal(resp: httpx.Response) -> str:
+    """
+    Відповідь API -> сигнал для AimdLimiter.
+    """
+    if resp.status_code in (429, 503) or (resp.status_code == 502 and "Cloudflare" in resp.text):
+        return "cf"
+    if resp.status_code == 504:
+        return "timeout"
+    if resp.status_code >= 400:
+        return "error"
+    return "ok"
+
+
+async def post_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: dict,
+    *,
+    retries: int,
+    backoff: float,
+    limiter: AimdLimiter | None = None,
+) -> httpx.Response:
+    for attempt in range(retries + 1):
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post(url, json=payload)
+            if limiter is not None:
+                limiter.record(response_signal(resp), time.perf_counter() - t0)
+            if resp.status_code not in RETRY_STATUSES or attempt == retries:
+                return resp
+            reason = f"HTTP {resp.status_code}"
+        except (httpx.TransportError, httpx.TimeoutException) as e:
+            if limiter is not None:
+                limiter.record("timeout" if isinstance(e, httpx.TimeoutException) else "error")
+            if attempt == retries:
+                raise
+            reason = f"{type(e).__name__}"
+
+        # експоненційний backoff з джитером
+        delay = backoff * (2 ** attempt) * (0.5 + random.random())
+        print(f"    retry {attempt + 1}/{retries} in {delay:.1f}s ({reason}) {payload['product_url']}")
+        await asyncio.sleep(delay)
+
+
+def _mark_failed(checkpoint: Checkpoint | None, frontier, i: int, url: str, err: str) -> None:
+    if checkpoint is not None:
+        checkpoint.mark_failed(i, err)
+    if frontier is not None:
+        frontier.record(url, ok=False, error=err)
+
+
+async def run_concurrent(items: list[tuple[int, str]], args, checkpoint: Checkpoint | None, frontier=None) -> None:
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    stats = {"ok": 0, "fail": 0, "reviews": 0, "inserted": 0}
+    latencies: list[float] = []
+    t_start = time.perf_counter()
+
+    # --concurrency — стеля; фактична паралельність і пауза підлаштовуються під відповіді API
+    limiter = AimdLimiter(
+        initial=min(args.initial_concurrency, args.concurrency),
+        max_limit=args.concurrency,
+        latency_target_s=args.latency_target or None,
+        delay_s=args.sleep,
+    )
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(600.0, connect=10.0)  # довго, бо playwright
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    i, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                await limiter.acquire()
+                t0 = time.perf_counter()
+                try:
+                    resp = await post_with_retry(
+                        client, API_URL, {"product_url": url, "full": args.full},
+                        retries=args.retries, backoff=args.backoff, limiter=limiter,
+                    )
+                    dt = time.perf_counter() - t0
+                    if resp.status_code >= 400:
+                        print(f"[{i}] FAIL {resp.status_code} {url} -> {resp.text[:300]}")
+                        stats["fail"] += 1
+                        _mark_failed(checkpoint, frontier, i, url, f"HTTP {resp.status_code}: {resp.text[:300]}")
+                    else:
+                        data = resp.json()
+                        reviews = data.get("count") or data.get("reviews_count") or 0
+                        inserted = data.get("attempted_insert") or data.get("inserted") or 0
+                        print(f"[{i}] OK {url} -> reviews={reviews} inserted={inserted} dup={data.get('duplicates')} {dt:.1f}s")
+                        stats["ok"] += 1
+                        stats["reviews"] += reviews
+                        stats["inserted"] += inserted
+                        latencies.append(dt)
+                        if checkpoint is not None:
+                            checkpoint.mark_done(i, {"url": url, "reviews": reviews, "inserted": inserted, "sec": round(dt, 2)})
+                        if frontier is not None:
+                            frontier.record(url, ok=True, review_count=data.get("advertised_count"))
+                except Exception as e:
+                    print(f"[{i}] EXC {url} -> {type(e).__name__}: {e}")
+                    stats["fail"] += 1
+                    _mark_failed(checkpoint, frontier, i, url, f"{type(e).__name__}: {e}")
+                finally:
+                    limiter.release()
+
+                await limiter.pace()
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+    elapsed_min = (time.perf_counter() - t_start) / 60
+    p50 = _percentile(latencies, 0.50)
+    p95 = _percentile(latencies, 0.95)
+    print(f"DONE ok={stats['ok']} fail={stats['fail']} in {elapsed_min:.1f} min")
+    if elapsed_min > 0:
+        print(
+            f"products/min={stats['ok'] / elapsed_min:.2f} reviews/min={stats['reviews'] / elapsed_min:.1f} "
+            f"inserted={stats['inserted']}"
+        )
+    if latencies:
+        print(f"latency p50={p50:.1f}s p95={p95:.1f}s")
+    rate = limiter.stats()
+    print(f"rate limit={rate['limit']} delay={rate['delay_s']}s signals={rate['signals']}")
+
+
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--start", type=int, required=True, help="0-based start index inclusive")
-    p.add_argument("--end", type=int, required=True, help="0-based end index exclusive")
-    p.add_argument("--sleep", type=float, default=1.0, help="sleep between requests")
+    p.add_argument("--start", type=int, default=None, help="0-based start index inclusive")
+    p.add_argument("--end", type=int, default=None, help="0-based end index exclusive")
+    p.add_argument("--sleep", type=float, default=0.0, help="initial pause per worker between requests (adapts)")
+    p.add_argument("--concurrency", type=int, default=8, help="max parallel requests to the API")
+    p.add_argument("--initial-concurrency", type=int, default=2, help="start with this many, grow while healthy")
+    p.add_argument("--latency-target", type=float, default=0.0, help="seconds per product above which to back off (0 = off)")
+    p.add_argument("--retries", type=int, default=3, help="retries on 5xx/429/network errors")
+    p.add_argument("--backoff", type=float, default=5.0, help="base backoff seconds (doubles each retry)")
+    p.add_argument("--checkpoint", default=None, help="checkpoint file (default: checkpoint_<start>_<end>.json)")
+    p.add_argument("--skip-failed", action="store_true", help="on resume, do not retry indexes that failed before")
+    p.add_argument("--jobs", action="store_true", help="submit to /jobs queue and poll instead of blocking calls")
+    p.add_argument("--full", action="store_true", help="ignore stored review watermark, re-crawl all review pages")
+    p.add_argument("--frontier", action="store_true", help="take due URLs from the crawl frontier instead of product_urls.json")
+    p.add_argument("--limit", type=int, default=100, help="with --frontier: how many due URLs to take")
     args = p.parse_args()
 
+    if args.frontier:
+        from frontier import Frontier
+
+        frontier = Frontier()
+        frontier.init_schema()
+        try:
+            urls = frontier.next_batch(args.limit)
+            print(f"Frontier: {len(urls)} due URLs")
+            asyncio.run(run_concurrent(list(enumerate(urls)), args, None, frontier))
+            print(frontier.stats())
+        finally:
+            frontier.close()
+        return
+
+    if args.start is None or args.end is None:
+        p.error("--start and --end are required (or use --frontier)")
+
     with open(IN_FILE, "r", encoding="utf-8") as f:
         urls = json.load(f)
 
     batch = urls[args.start:args.end]
     print(f"Batch size: {len(batch)} (indexes {args.start}:{args.end})")
 
-    ok = 0
-    fail = 0
+    if args.jobs:
+        run_jobs(batch, args.start, poll=max(args.sleep, 1.0), full=args.full)
+        return
 
+    checkpoint = Checkpoint(Path(args.checkpoint or f"checkpoint_{args.start}_{args.end}.json"))
+    items = []
     for i, url in enumerate(batch, start=args.start):
-        payload = {"product_url": url}
-        try:
-            resp = requests.post(API_URL, json=payload, timeout=600)  # довго, бо playwright
-            if resp.status_code >= 400:
-                print(f"[{i}] FAIL {resp.status_code} {url} -> {resp.text[:300]}")
-                fail += 1
-            else:
-                data = resp.json()
-                print(f"[{i}] OK {url} -> reviews={data.get('count') or data.get('reviews_count')} inserted={data.get('attempted_insert') or data.get('inserted')}")
-                ok += 1
-        except Exception as e:
-            print(f"[{i}] EXC {url} -> {type(e).__name__}: {e}")
-            fail += 1
-
-        time.sleep(args.sleep)
+        if str(i) in checkpoint.done:
+            continue
+        if args.skip_failed and str(i) in checkpoint.failed:
+            continue
+        items.append((i, url))
+
+    if len(items) < len(batch):
+        print(f"Resume from {checkpoint.path}: {len(batch) - len(items)} already handled, {len(items)} left")
+
+    asyncio.run(run_concurrent(items, args, checkpoint))
 
-    print(f"DONE ok={ok} fail={fail}")
 
 if __name__ == "__main__":
     main()
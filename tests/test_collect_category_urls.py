@@ -0,0 +1,36 @@
+import json
+
+from collect_category_urls import Collector, write_url_list
+
+
+def test_url_list_is_append_only(tmp_path):
+    out = tmp_path / "product_urls.json"
+    out.write_text(json.dumps(["https://rozetka.com.ua/z/p9/", "https://rozetka.com.ua/a/p1/"]), encoding="utf-8")
+
+    urls = write_url_list(out, ["https://rozetka.com.ua/a/p1/", "https://rozetka.com.ua/m/p5/", "https://rozetka.com.ua/b/p2/"])
+
+    # наявні індекси не зсуваються, нові — в кінець у порядку знаходження
+    assert urls == [
+        "https://rozetka.com.ua/z/p9/",
+        "https://rozetka.com.ua/a/p1/",
+        "https://rozetka.com.ua/m/p5/",
+        "https://rozetka.com.ua/b/p2/",
+    ]
+    assert json.loads(out.read_text(encoding="utf-8")) == urls
+
+
+def test_rerun_counts_urls_new_in_this_run(tmp_path):
+    jsonl = tmp_path / "product_urls.jsonl"
+    cat = "https://rozetka.com.ua/ua/mobile-phones/c80003/"
+    links = ["https://rozetka.com.ua/phone/p1/", "https://rozetka.com.ua/phone/p2/"]
+
+    first = Collector(jsonl)
+    assert first.add(links, cat, 1) == (2, 2)
+    first.close()
+
+    rerun = Collector(jsonl)
+    # усі вже в JSONL, але в цьому запуску вперше — обхід без пагінатора має йти далі
+    assert rerun.add(links, cat, 1) == (0, 2)
+    assert rerun.add(links, cat, 2) == (0, 0)
+    assert rerun.order == ["https://rozetka.com.ua/phone/p1/", "https://rozetka.com.ua/phone/p2/"]
+    rerun.close()
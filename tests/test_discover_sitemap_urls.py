@@ -0,0 +1,36 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import discover_sitemap_urls
+
+FIXTURES = Path(__file__).resolve().parent.parent / "data" / "sitemap_fixtures"
+
+
+def _discover(monkeypatch, tmp_path, out):
+    monkeypatch.setattr(sys, "argv", [
+        "discover_sitemap_urls.py",
+        "--local", str(FIXTURES),
+        "--out-jsonl", str(tmp_path / "sitemap.jsonl"),
+        "--out", str(out),
+    ])
+    asyncio.run(discover_sitemap_urls.main())
+    return json.loads(out.read_text(encoding="utf-8"))
+
+
+def test_discovery_appends_to_url_list_without_reordering(monkeypatch, tmp_path):
+    out = tmp_path / "product_urls.json"
+    # уже зібране collect_category_urls.py — індекси, на яких стоять checkpoint-и
+    existing = ["https://rozetka.com.ua/ua/zzz/p999999999/", "https://rozetka.com.ua/ua/aaa/p1/"]
+    out.write_text(json.dumps(existing), encoding="utf-8")
+
+    first = _discover(monkeypatch, tmp_path, out)
+    assert first[:len(existing)] == existing
+    found = first[len(existing):]
+    assert found and all("/p" in u for u in found)
+    assert len(set(first)) == len(first)
+
+    # повторний запуск: нічого не переставляється і не дублюється
+    second = _discover(monkeypatch, tmp_path, out)
+    assert second == first
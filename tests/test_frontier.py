@@ -0,0 +1,40 @@
+import threading
+
+from frontier import Frontier
+
+
+def test_concurrent_drivers_do_not_lease_the_same_urls(tmp_path):
+    dsn = f"sqlite:///{tmp_path / 'frontier.sqlite'}"
+    setup = Frontier(dsn)
+    setup.init_schema()
+    setup.add_urls([{"url": f"https://rozetka.com.ua/p{i}/"} for i in range(200)])
+    setup.close()
+
+    leased: list[list[str]] = []
+    barrier = threading.Barrier(4)
+
+    def driver() -> None:
+        f = Frontier(dsn)
+        barrier.wait()
+        leased.append(f.next_batch(80))
+        f.close()
+
+    threads = [threading.Thread(target=driver) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    urls = [u for batch in leased for u in batch]
+    assert len(urls) == 200
+    assert len(set(urls)) == len(urls)
+
+
+def test_next_batch_leases_only_due_urls(tmp_path):
+    f = Frontier(f"sqlite:///{tmp_path / 'frontier.sqlite'}")
+    f.init_schema()
+    f.add_urls([{"url": "https://rozetka.com.ua/p1/"}, {"url": "https://rozetka.com.ua/p2/"}])
+    assert sorted(f.next_batch(10)) == ["https://rozetka.com.ua/p1/", "https://rozetka.com.ua/p2/"]
+    # lease переносить next_due_at у майбутнє
+    assert f.next_batch(10) == []
+    f.close()
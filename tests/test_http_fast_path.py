@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import httpx
+
+import app_v2
+
+PRODUCT_URL = "https://rozetka.com.ua/ua/phone/p1/"
+
+CF_HTML = "<html><head><title>Just a moment...</title></head><body><div id=\"cf-chl-widget\"></div></body></html>"
+
+# "<h1" + JSON-LD є, але JSON-LD лише про хлібні крихти: ні reviews_count, ні товару
+STUB_HTML = """
+<html><head>
+<script type="application/ld+json">{"@context": "https://schema.org", "@type": "BreadcrumbList"}</script>
+</head><body><h1>Телефон X</h1></body></html>
+"""
+
+FULL_HTML = """
+<html><head>
+<script type="application/ld+json">%s</script>
+</head><body><h1>Телефон X</h1></body></html>
+""" % json.dumps({
+    "@type": "Product",
+    "name": "Телефон X",
+    "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.5", "reviewCount": "12"},
+})
+
+
+def make_fast_path(html: str) -> app_v2.HttpFastPath:
+    fp = app_v2.HttpFastPath()
+    fp.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda req: httpx.Response(200, text=html)))
+    # без контекстів пулу cookies не оновлюються
+    fp.cookies_at = float("inf")
+    return fp
+
+
+def test_cloudflare_on_fast_path_is_counted_without_slowing_the_browser():
+    fp = make_fast_path(CF_HTML)
+    limiter_before = dict(app_v2._limiter.counts), app_v2._limiter.limit, app_v2._limiter.delay_s
+    browser_cf_before = app_v2._m_cf._values.get((), 0)
+    http_cf_before = app_v2._m_http_cf._values.get((), 0)
+
+    html, result = asyncio.run(fp.fetch(PRODUCT_URL))
+
+    assert (html, result) == (None, "cf")
+    assert app_v2._m_http_cf._values.get((), 0) == http_cf_before + 1
+    assert app_v2._m_cf._values.get((), 0) == browser_cf_before
+    assert (dict(app_v2._limiter.counts), app_v2._limiter.limit, app_v2._limiter.delay_s) == limiter_before
+    assert fp.cf_streak == 1
+
+
+def test_incomplete_http_parse_falls_back_to_browser(monkeypatch):
+    monkeypatch.setattr(app_v2, "_http", make_fast_path(STUB_HTML))
+    monkeypatch.setattr(app_v2, "EXTRACT_MODE", "html")
+    monkeypatch.setattr(app_v2, "archive_page", lambda *a, **kw: None)
+
+    async def fake_browser(url, *, timeout_ms):
+        return FULL_HTML
+
+    monkeypatch.setattr(app_v2, "fetch_product_html", fake_browser)
+
+    product_data, path = asyncio.run(app_v2._product_stage(PRODUCT_URL, {}))
+
+    assert path == "browser"
+    assert product_data["reviews_count"] == 12
+    assert app_v2._http.results == {"incomplete": 1}
+
+
+def test_complete_http_parse_is_used(monkeypatch):
+    monkeypatch.setattr(app_v2, "_http", make_fast_path(FULL_HTML))
+    monkeypatch.setattr(app_v2, "archive_page", lambda *a, **kw: None)
+
+    product_data, path = asyncio.run(app_v2._product_stage(PRODUCT_URL, {}))
+
+    assert path == "http"
+    assert product_data["title"] == "Телефон X"
+    assert app_v2._http.results == {"ok": 1}
@@ -0,0 +1,26 @@
+from datetime import date
+
+import app_v2
+
+STORED = date(2024, 3, 1)
+
+
+def test_stops_when_newest_first_page_reaches_stored_reviews():
+    dates = [date(2024, 3, 10), date(2024, 3, 5), None, date(2024, 2, 20)]
+    assert app_v2.passed_stored_reviews(dates, STORED)
+
+
+def test_does_not_stop_before_reaching_stored_reviews():
+    assert not app_v2.passed_stored_reviews([date(2024, 3, 10), date(2024, 3, 2)], STORED)
+
+
+def test_does_not_stop_when_page_is_not_sorted_by_date():
+    # напр. сортування "корисні": новий відгук може бути нижче за старий
+    dates = [date(2024, 1, 5), date(2024, 3, 20), date(2024, 2, 1)]
+    assert not app_v2.passed_stored_reviews(dates, STORED)
+
+
+def test_comments_url_forces_date_sort():
+    assert app_v2.rozetka_comments_url("https://rozetka.com.ua/ua/phone/p1?x=1") == (
+        "https://rozetka.com.ua/ua/phone/p1/comments/?sort=date"
+    )
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import app_v2
+
+pytestmark = pytest.mark.skipif(app_v2.LexborHTMLParser is None, reason="selectolax not installed")
+
+COMMENTS_URL = "https://rozetka.com.ua/ua/phone/p1/comments/"
+PRODUCT_URL = "https://rozetka.com.ua/ua/phone/p1/"
+
+REVIEWS_HTML = """
+<html><head>
+<style>.x::after { content: "Відгук від покупця. Стиль"; }</style>
+<script>window.i18n = {"title": "Відгук від покупця.", "reply": "Відповісти"};</script>
+</head><body>
+<template><div>Відгук від покупця.</div><div>Шаблон картки</div></template>
+<div class="comment">
+  <div>Відгук від покупця.</div>
+  <div>Продавець: Rozetka · 15 березня 2024</div>
+  <div>Чудовий телефон.<br>Батарея тримає два дні.</div>
+  <div>Переваги:</div><div>Екран</div>
+  <div>Недоліки:</div><div>Ціна</div>
+  <button>Відповісти</button>
+</div>
+<div class="comment">
+  <div>Відгук від покупця.</div>
+  <div>Продавець: Rozetka · 2 квітня 2024</div>
+  <div>Нормально</div>
+  <button>Відповісти</button>
+</div>
+</body></html>
+"""
+
+PRODUCT_HTML = """
+<html><head>
+<script type="application/ld+json">%s</script>
+</head><body>
+<h1>Телефон X <script>track("h1")</script></h1>
+<div data-testid="product-description">Опис <style>.d{}</style>товару<template>прихований</template></div>
+<table><tr><th>Колір</th><td>Чорний<script>var c = 1;</script></td></tr></table>
+<dl><dt>Памʼять</dt><dd>128 ГБ</dd></dl>
+</body></html>
+""" % json.dumps({
+    "@type": "Product",
+    "name": "Телефон X",
+    "sku": "123",
+    "brand": {"@type": "Brand", "name": "Acme"},
+    "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.5", "reviewCount": "12"},
+}, ensure_ascii=False)
+
+
+def _both(monkeypatch, fn, *args):
+    out = {}
+    for backend in ("bs4", "selectolax"):
+        monkeypatch.setattr(app_v2, "PARSER_BACKEND", backend)
+        out[backend] = fn(*args)
+    return out["bs4"], out["selectolax"]
+
+
+def test_reviews_parser_backends_agree_and_ignore_script_style_template(monkeypatch):
+    bs4_reviews, lexbor_reviews = _both(monkeypatch, app_v2.parse_rozetka_reviews_from_html, REVIEWS_HTML, COMMENTS_URL)
+    assert bs4_reviews == lexbor_reviews
+    assert [r["text"] for r in bs4_reviews] == ["Чудовий телефон.", "Нормально"]
+
+
+def test_product_parser_backends_agree(monkeypatch):
+    bs4_data, lexbor_data = _both(monkeypatch, app_v2.parse_product_details_from_html, PRODUCT_HTML, PRODUCT_URL)
+    # description_html — сирий html вузла; серіалізація атрибутів у парсерів різна
+    bs4_data.pop("description_html")
+    lexbor_data.pop("description_html")
+    assert bs4_data == lexbor_data
+    assert bs4_data["title"] == "Телефон X"
+    assert bs4_data["reviews_count"] == 12
+
+
+def test_backends_agree_on_committed_fixtures():
+    from pathlib import Path
+
+    import bench_parsers
+
+    fixtures = Path(__file__).resolve().parent.parent / bench_parsers.FIXTURES_DIR
+    corpus = bench_parsers.load_corpus(fixtures, [50])
+    assert sum(1 for item in corpus if item["kind"] == "comments") >= 2
+    assert bench_parsers.check_backends_agree(corpus, ["bs4", "selectolax"]) == []
+    assert app_v2.PARSER_BACKEND == "bs4"
@@ -0,0 +1,39 @@
+from page_archive import PageArchive
+
+import app_v2
+import replay_archive
+from test_review_keys import DOM_HTML, _api_review
+
+PRODUCT_URL = "https://rozetka.com.ua/ua/phone/p1/"
+PRODUCT_HTML = "<html><body><h1>Телефон</h1></body></html>"
+
+
+def _run(tmp_path, **comments_meta):
+    archive = PageArchive(tmp_path)
+    archive.put(PRODUCT_HTML, url=PRODUCT_URL, kind="product", product_url=PRODUCT_URL, ingest_id="i1")
+    archive.put(DOM_HTML, url=PRODUCT_URL + "comments/", kind="comments", ingest_id="i1", **comments_meta)
+    runs = replay_archive.group_runs(list(archive.iter_index()), latest_only=True)
+    assert len(runs) == 1
+    return replay_archive.parse_run(str(tmp_path), runs[0])
+
+
+def test_replay_uses_archived_ids_and_ratings(tmp_path):
+    res = _run(tmp_path, ratings=[5], review_ids=["987654"])
+    assert [(r["source_review_id"], r["rating"]) for r in res["reviews"]] == [("987654", 5)]
+
+
+def test_replay_reparses_comments_pages_without_ids(tmp_path):
+    res = _run(tmp_path, ratings=[5])
+    assert [(r.get("source_review_id"), r["rating"]) for r in res["reviews"]] == [(None, 5)]
+    assert res["captured_at"]
+
+
+def test_replayed_dom_review_matches_live_api_row(tmp_path):
+    # живий ingest зберіг відгук з id, replay DOM-знімку без id не додає другий рядок
+    api = _api_review()
+    app_v2.assign_review_keys([api])
+    replayed = _run(tmp_path, ratings=[5])["reviews"]
+    app_v2.assign_review_keys(replayed)
+
+    fresh, upgrades = app_v2.match_cross_source(replayed, [(api["review_key"], api["content_key"])])
+    assert fresh == [] and upgrades == []
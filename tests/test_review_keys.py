@@ -0,0 +1,128 @@
+import sqlite3
+
+import app_v2
+
+COMMENTS_URL = "https://rozetka.com.ua/ua/phone/p1/comments/"
+
+API_ITEM = {
+    "id": 987654,
+    "mark": 5,
+    "text": "Чудовий телефон.<br>Батарея тримає два дні.",
+    "dignity": "Екран",
+    "shortcomings": "Ціна",
+    "created": "2024-03-15T10:20:00",
+}
+
+DOM_HTML = """
+<html><body>
+<div class="comment">
+  <div>Відгук від покупця.</div>
+  <div>Продавець: Rozetka · 15 березня 2024</div>
+  <div class="text">Чудовий телефон.<br>Батарея тримає два дні.</div>
+  <div>Переваги:</div><div>Екран</div>
+  <div>Недоліки:</div><div>Ціна</div>
+  <button>Відповісти</button>
+</div>
+</body></html>
+"""
+
+
+def _api_review():
+    return app_v2.review_from_api_item(API_ITEM, COMMENTS_URL)
+
+
+def _dom_review():
+    # DOM-гілка без data-comment-id: рейтинг із зірок, id немає
+    reviews = app_v2.parse_rozetka_reviews_from_html(DOM_HTML, COMMENTS_URL)
+    assert len(reviews) == 1
+    reviews[0]["rating"] = 5
+    return reviews[0]
+
+
+def test_same_review_from_api_and_dom_shares_content_key():
+    api, dom = _api_review(), _dom_review()
+    app_v2.assign_review_keys([api])
+    app_v2.assign_review_keys([dom])
+
+    assert api["review_key"] == "id:987654"
+    assert dom["review_key"].startswith("h:")
+    assert api["content_key"] == dom["content_key"]
+
+
+def _db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE reviews ({', '.join(app_v2.REVIEW_COLUMNS)})")
+    conn.execute("CREATE UNIQUE INDEX uq_reviews_product_key ON reviews (product_id, review_key)")
+    conn.execute("CREATE INDEX ix_reviews_product_content ON reviews (product_id, content_key)")
+    return conn
+
+
+def _store(conn, reviews):
+    # те саме, що insert_reviews, але на sqlite
+    cols = app_v2.REVIEW_COLUMNS
+    app_v2.assign_review_keys(reviews)
+    stored = conn.execute("SELECT review_key, content_key FROM reviews WHERE product_id = 1").fetchall()
+    fresh, upgrades = app_v2.match_cross_source(reviews, stored)
+    conn.executemany(
+        "UPDATE reviews SET review_key = ?, source_review_id = ? WHERE product_id = 1 AND review_key = ?",
+        [(r["review_key"], r["source_review_id"], h_key) for h_key, r in upgrades],
+    )
+    rows = app_v2.review_rows(product_id=1, comments_url=COMMENTS_URL, reviews=fresh)
+    conn.executemany(
+        f"INSERT INTO reviews ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) ON CONFLICT DO NOTHING",
+        [tuple(str(v) if hasattr(v, "isoformat") else v for v in row) for row in rows],
+    )
+
+
+def _keys(conn):
+    return sorted(k for (k,) in conn.execute("SELECT review_key FROM reviews"))
+
+
+def _count(conn):
+    return conn.execute("SELECT count(*) FROM reviews").fetchone()[0]
+
+
+def test_review_ingested_through_both_paths_is_stored_once():
+    conn = _db()
+    _store(conn, [_api_review()])
+    _store(conn, [_dom_review()])
+    assert _count(conn) == 1
+
+    # і в зворотному порядку: спершу DOM без id, потім JSON з id
+    conn = _db()
+    _store(conn, [_dom_review()])
+    _store(conn, [_api_review()])
+    assert _count(conn) == 1
+
+
+def test_distinct_reviews_with_identical_content_are_all_stored():
+    conn = _db()
+    # два різні відгуки з id сайту, однаковий текст/дата/оцінка
+    api_1 = app_v2.review_from_api_item({**API_ITEM, "id": 1}, COMMENTS_URL)
+    api_2 = app_v2.review_from_api_item({**API_ITEM, "id": 2}, COMMENTS_URL)
+    _store(conn, [api_1, api_2])
+    assert _count(conn) == 2
+
+    # ті самі два з DOM — уже є; третій такий самий з DOM — новий відгук
+    _store(conn, [_dom_review(), _dom_review()])
+    assert _count(conn) == 2
+    _store(conn, [_dom_review(), _dom_review(), _dom_review()])
+    assert _count(conn) == 3
+    _store(conn, [_dom_review(), _dom_review(), _dom_review()])
+    assert _count(conn) == 3
+
+    # id третього забирає собі DOM-рядок; наступний id — новий відгук
+    _store(conn, [app_v2.review_from_api_item({**API_ITEM, "id": 3}, COMMENTS_URL)])
+    assert _keys(conn) == ["id:1", "id:2", "id:3"]
+    _store(conn, [app_v2.review_from_api_item({**API_ITEM, "id": 4}, COMMENTS_URL)])
+    assert _count(conn) == 4
+    _store(conn, [_dom_review() for _ in range(4)])
+    assert _count(conn) == 4
+
+
+def test_two_dom_reviews_with_same_content_then_api_ids():
+    conn = _db()
+    _store(conn, [_dom_review(), _dom_review()])
+    assert _count(conn) == 2
+    _store(conn, [app_v2.review_from_api_item({**API_ITEM, "id": n}, COMMENTS_URL) for n in (7, 8)])
+    assert _keys(conn) == ["id:7", "id:8"]
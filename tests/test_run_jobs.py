@@ -0,0 +1,49 @@
+import run_range_to_db
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self) -> dict:
+        return self._data
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+def test_run_jobs_maps_indexes_past_rejected_and_survives_evicted_jobs(monkeypatch, capsys):
+    batch = ["u0", "u1", "u2", "u3"]
+
+    def fake_post(url, json, timeout):
+        return FakeResponse(200, {
+            "accepted": [
+                {"job_id": "a", "product_url": "u0", "index": 0},
+                {"job_id": "c", "product_url": "u2", "index": 2},
+                {"job_id": "d", "product_url": "u3", "index": 3},
+            ],
+            "rejected": ["u1"],
+        })
+
+    def fake_get(url, timeout):
+        job_id = url.split("/jobs/")[1].split("/")[0]
+        if job_id == "d":
+            return FakeResponse(404, {"detail": "Unknown job: d"})
+        if url.endswith("/result"):
+            return FakeResponse(200, {"count": 1, "inserted": 1, "duplicates": 0})
+        return FakeResponse(200, {"status": "done"})
+
+    monkeypatch.setattr(run_range_to_db.requests, "post", fake_post)
+    monkeypatch.setattr(run_range_to_db.requests, "get", fake_get)
+    monkeypatch.setattr(run_range_to_db.time, "sleep", lambda s: None)
+
+    run_range_to_db.run_jobs(batch, start=100, poll=0)
+    out = capsys.readouterr().out
+
+    assert "[101] REJECTED (queue full) u1" in out
+    assert "[100] OK u0" in out
+    assert "[102] OK u2" in out
+    assert "[103] LOST u3" in out
+    assert "DONE ok=2 fail=2" in out